@@ -5,22 +5,28 @@ Modern FastAPI application with improved architecture, error handling,
 and configuration management following AP2 best practices.
 """
 
+import base64
+import hashlib
+import hmac
+import logging
 import time
 import asyncio
+from collections import deque
 from contextlib import asynccontextmanager
 from typing import Dict, Any
 
 import aiohttp
+import orjson
 from fastapi import FastAPI, Request, HTTPException
 from linebot.models import MessageEvent, TextSendMessage
-from linebot.exceptions import InvalidSignatureError
 from linebot.aiohttp_async_http_client import AiohttpAsyncHttpClient
-from linebot import AsyncLineBotApi, WebhookParser
+from linebot import AsyncLineBotApi
 
 # Import new modularized components
 from src.linebot_ap2.config import get_settings, validate_environment
-from src.linebot_ap2.common import SessionManager, IntentDetector, setup_logger
-from src.linebot_ap2.common.logger import log_agent_interaction, log_error_with_context
+from src.linebot_ap2.common import AsyncBatcher, SessionManager, IntentDetector, setup_logger
+from src.linebot_ap2.common.logger import log_error_with_context
+from src.linebot_ap2.common.serialization import json_loads
 from src.linebot_ap2.agents import (
     create_enhanced_shopping_agent,
     create_enhanced_payment_agent
@@ -32,16 +38,39 @@ from google.genai import types
 
 class LineBot:
     """Enhanced LINE Bot with improved architecture."""
+
+    # System instruction for the no-tool fast path; the config wrapping it
+    # is built once in _init_agents and reused per call
+    SMALLTALK_INSTRUCTION = (
+        "You are a friendly shopping assistant for a LINE bot. "
+        "Answer greetings and general questions briefly in the user's "
+        "language, and invite them to browse or search for products."
+    )
     
     def __init__(self):
         # Load and validate configuration
         self.settings = validate_environment()
         self.logger = setup_logger(level=self.settings.log_level)
         
-        # Initialize components
-        self.session_manager = SessionManager(self.settings.app_name)
+        # Initialize components. Passing redis_url switches session
+        # storage to Redis so Celery workers see web-created sessions;
+        # unset, sessions stay in-process (single-worker/demo runs)
+        self.session_manager = SessionManager(
+            self.settings.app_name,
+            config={
+                "redis_url": self.settings.redis_url,
+                "session_timeout_minutes": self.settings.session_timeout_minutes
+            }
+        )
         self.intent_detector = IntentDetector()
         
+        # In-flight coalescing map: (user_id, message) -> Future
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
+        # Per-message latency samples; a background task aggregates and
+        # emits percentiles instead of logging every interaction
+        self._metric_ring: deque = deque(maxlen=10_000)
+
         # Initialize LINE Bot components
         self._init_line_bot()
         
@@ -52,14 +81,26 @@ class LineBot:
     
     def _init_line_bot(self):
         """Initialize LINE Bot API components."""
-        self.session = aiohttp.ClientSession()
+        # Explicit connector sizing: the default 100-socket limit caps
+        # concurrent in-flight requests and defaults skip DNS caching
+        connector = aiohttp.TCPConnector(
+            limit=1000,
+            limit_per_host=200,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
         self.async_http_client = AiohttpAsyncHttpClient(self.session)
         self.line_bot_api = AsyncLineBotApi(
-            self.settings.line_channel_access_token, 
+            self.settings.line_channel_access_token,
             self.async_http_client
         )
-        self.parser = WebhookParser(self.settings.line_channel_secret)
-        
+        self.channel_secret = self.settings.line_channel_secret.encode("utf-8")
+
         self.logger.info("✓ LINE Bot API components initialized")
     
     def _init_agents(self):
@@ -88,11 +129,53 @@ class LineBot:
             session_service=self.session_manager.session_service,
         )
 
+        # Direct-Gemini fast path for messages that need no tools: the
+        # client is created lazily, the generation config once
+        self._genai_client = None
+        self._smalltalk_config = types.GenerateContentConfig(
+            system_instruction=self.SMALLTALK_INSTRUCTION
+        )
+
+        # Batchers coalesce bursts of concurrent messages: calls already
+        # queued behind an in-flight batch dispatch in one gather, sharing
+        # the event-loop scheduling pass and connection pool; a lone
+        # message dispatches immediately with no added latency
+        self.shopping_batcher = AsyncBatcher(
+            self._execute_agent_call, max_batch_size=16, max_queue_time=0.05
+        )
+        self.payment_batcher = AsyncBatcher(
+            self._execute_agent_call, max_batch_size=16, max_queue_time=0.05
+        )
+
         self.logger.info("✓ Enhanced agents and runners initialized successfully")
     
     async def process_message(self, event: MessageEvent) -> str:
+        """Process incoming message, coalescing duplicate in-flight calls."""
+        key = (event.source.user_id, event.message.text)
+
+        # Double-delivered webhooks (button double-taps, LINE retries)
+        # piggyback on the in-flight call instead of paying Gemini twice
+        # and racing on the same session
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await inflight
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._process_message_impl(event)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _process_message_impl(self, event: MessageEvent) -> str:
         """Process incoming message with enhanced error handling."""
-        start_time = time.time()
+        # Monotonic and cheaper than time.time(), immune to NTP jumps
+        start_ns = time.perf_counter_ns()
         user_id = event.source.user_id
         message = event.message.text
         
@@ -106,18 +189,27 @@ class LineBot:
                 f"Intent detected: {intent} (confidence: {confidence:.2f}) for user: {user_id}"
             )
             
-            # Get or create session
-            session_id = await self.session_manager.get_or_create_session(user_id)
-            
-            # Route to appropriate agent
-            response = await self._call_agent(message, user_id, session_id, intent)
-            
-            # Log interaction
-            processing_time = time.time() - start_time
-            log_agent_interaction(
-                self.logger, user_id, intent, message, response, processing_time
-            )
+            if (
+                intent != 'payment'
+                and not intent_result["matched_keywords"]
+                and not intent_result["matched_patterns"]
+            ):
+                # No shopping/payment signal at all (greetings, smalltalk):
+                # one direct Gemini call, skipping the runner's event
+                # machinery, session lookup and session writes entirely
+                response = await self._call_gemini_direct(message)
+            else:
+                # Get or create session
+                session_id = await self.session_manager.get_or_create_session(user_id)
+
+                # Route to appropriate agent
+                response = await self._call_agent(message, user_id, session_id, intent)
             
+            # Record latency sample; aggregated percentiles are emitted
+            # periodically instead of one log line per message
+            elapsed_us = (time.perf_counter_ns() - start_ns) // 1000
+            self._metric_ring.append((user_id, intent, elapsed_us))
+
             return response
             
         except Exception as e:
@@ -126,8 +218,40 @@ class LineBot:
             )
             return "抱歉，處理您的訊息時發生錯誤。請稍後再試。"
     
+    async def _call_gemini_direct(self, message: str) -> str:
+        """Answer a no-tool message with a single direct Gemini call."""
+        if self._genai_client is None:
+            from google import genai
+            self._genai_client = genai.Client()
+
+        response = await self._genai_client.aio.models.generate_content(
+            model=self.settings.default_model,
+            contents=message,
+            config=self._smalltalk_config
+        )
+        return response.text or "抱歉，無法處理您的請求。"
+
     async def _call_agent(self, message: str, user_id: str, session_id: str, intent: str) -> str:
-        """Call appropriate agent based on intent."""
+        """Call appropriate agent based on intent, batching bursty traffic."""
+        if self.settings.celery_broker_url and intent == 'payment':
+            # Offload multi-step payment flows to the worker pool: ack the
+            # user now, the worker pushes the result via the LINE push API
+            from src.linebot_ap2.tasks import run_agent
+
+            run_agent.delay(user_id, session_id, message, intent)
+            return "付款處理中，完成後會立即通知您。"
+
+        if intent == 'payment':
+            batcher = self.payment_batcher
+        else:
+            batcher = self.shopping_batcher
+
+        return await batcher.process((message, user_id, session_id, intent))
+
+    async def _execute_agent_call(self, item) -> str:
+        """Run one batched agent request."""
+        message, user_id, session_id, intent = item
+
         # Select runner based on intent
         if intent == 'payment':
             selected_runner = self.payment_runner
@@ -136,19 +260,64 @@ class LineBot:
             selected_runner = self.shopping_runner
             agent_name = "Shopping"
         
-        self.logger.debug(f"Using {agent_name} agent for user {user_id}")
+        self.logger.debug("Using %s agent for user %s", agent_name, user_id)
         
-        # Prepare message
-        content = types.Content(role="user", parts=[types.Part(text=message)])
+        # Prepare message; the shape is known-good, so model_construct
+        # skips pydantic validation on this per-message hot path
+        content = types.Content.model_construct(
+            role="user", parts=[types.Part.model_construct(text=message)]
+        )
         
         try:
             # Execute agent
-            async for event in selected_runner.run_async(
-                user_id=user_id, session_id=session_id, new_message=content
-            ):
-                # Log all events for debugging
-                if hasattr(event, 'content') and event.content:
-                    self.logger.debug(f"Agent event: final={event.is_final_response()}, parts={len(event.content.parts) if event.content.parts else 0}")
+            response = await self._drain_agent_response(
+                selected_runner, content, user_id, session_id
+            )
+            if response is not None:
+                return response
+
+        except ValueError as e:
+            if "Session not found" in str(e):
+                # Handle session error by recreating
+                self.logger.warning(f"Session error for user {user_id}, recreating...")
+                session_id = await self.session_manager.handle_session_error(user_id)
+
+                # Retry with new session
+                response = await self._drain_agent_response(
+                    selected_runner, content, user_id, session_id
+                )
+                if response is not None:
+                    return response
+            else:
+                raise
+
+        return "抱歉，無法處理您的請求。"
+
+    async def _drain_agent_response(
+        self, runner: Runner, content, user_id: str, session_id: str
+    ) -> str:
+        """Run one agent stream and return the final response text.
+
+        The generator is closed deterministically in the finally block, so
+        returning on the final response frees in-flight tool calls and the
+        underlying Gemini connection immediately instead of waiting for GC,
+        and the whole run is bounded by the configured agent timeout.
+        """
+        gen = runner.run_async(
+            user_id=user_id, session_id=session_id, new_message=content
+        )
+
+        async def _consume():
+            async for event in gen:
+                # Log all events for debugging; guard so the f-string work
+                # is skipped entirely when DEBUG is off
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    if hasattr(event, 'content') and event.content:
+                        self.logger.debug(
+                            "Agent event: final=%s, parts=%d",
+                            event.is_final_response(),
+                            len(event.content.parts) if event.content.parts else 0
+                        )
 
                 # Only process final response
                 if event.is_final_response():
@@ -163,34 +332,35 @@ class LineBot:
 
                     if event.actions and event.actions.escalate:
                         return f"Agent escalated: {event.error_message or 'No specific message.'}"
-                    
-        except ValueError as e:
-            if "Session not found" in str(e):
-                # Handle session error by recreating
-                self.logger.warning(f"Session error for user {user_id}, recreating...")
-                session_id = await self.session_manager.handle_session_error(user_id)
-                
-                # Retry with new session
-                async for event in selected_runner.run_async(
-                    user_id=user_id, session_id=session_id, new_message=content
-                ):
-                    if event.is_final_response():
-                        if event.content and event.content.parts:
-                            # Extract text from all text parts
-                            text_parts = [
-                                part.text for part in event.content.parts
-                                if hasattr(part, 'text') and part.text
-                            ]
-                            if text_parts:
-                                return "\n".join(text_parts)
-
-                        if event.actions and event.actions.escalate:
-                            return f"Agent escalated: {event.error_message or 'No specific message.'}"
-            else:
-                raise
-        
-        return "抱歉，無法處理您的請求。"
+            return None
+
+        try:
+            return await asyncio.wait_for(
+                _consume(), timeout=self.settings.agent_timeout_seconds
+            )
+        finally:
+            await gen.aclose()
     
+    def flush_metrics(self):
+        """Aggregate buffered latency samples and emit one summary line."""
+        ring = self._metric_ring
+        if not ring:
+            return
+
+        samples = []
+        while ring:
+            samples.append(ring.popleft())
+
+        latencies = sorted(sample[2] for sample in samples)
+        count = len(latencies)
+        self.logger.info(
+            "Agent metrics | count=%d | p50=%dus | p95=%dus | max=%dus",
+            count,
+            latencies[count // 2],
+            latencies[min(count - 1, int(count * 0.95))],
+            latencies[-1]
+        )
+
     async def cleanup(self):
         """Cleanup resources."""
         if hasattr(self, 'session'):
@@ -201,17 +371,54 @@ class LineBot:
 # Global app instance
 bot_instance = None
 
+# Canned replies built once; reusing the instances skips model
+# construction on every failure
+ERROR_MSG = TextSendMessage(text="抱歉，處理您的訊息時發生錯誤。")
+
+# Background consumers draining the webhook event queue
+EVENT_CONSUMER_COUNT = 4
+
+# Seconds between aggregated latency-metric emissions
+METRICS_FLUSH_INTERVAL = 30.0
+
+
+async def _metrics_flusher():
+    """Periodically emit aggregated latency percentiles."""
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+        bot_instance.flush_metrics()
+
+
+async def _event_consumer(queue: asyncio.Queue):
+    """Process queued webhook events off the HTTP response path."""
+    while True:
+        event = await queue.get()
+        try:
+            await _handle_event(event)
+        except Exception as e:
+            bot_instance.logger.error(f"Error handling queued event: {e}")
+        finally:
+            queue.task_done()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management."""
     global bot_instance
-    
+
     # Startup
     bot_instance = LineBot()
+    app.state.event_queue = asyncio.Queue()
+    background_tasks = [
+        asyncio.create_task(_event_consumer(app.state.event_queue))
+        for _ in range(EVENT_CONSUMER_COUNT)
+    ]
+    background_tasks.append(asyncio.create_task(_metrics_flusher()))
     yield
-    
+
     # Shutdown
+    for task in background_tasks:
+        task.cancel()
     if bot_instance:
         await bot_instance.cleanup()
 
@@ -232,42 +439,55 @@ async def handle_callback(request: Request):
     if not signature:
         raise HTTPException(status_code=400, detail="Missing signature")
     
-    # Get request body
+    # Get request body once and work on the raw bytes throughout
     body = await request.body()
-    body_text = body.decode()
-    
-    try:
-        events = bot_instance.parser.parse(body_text, signature)
-    except InvalidSignatureError:
+
+    # Verify the HMAC directly on the bytes: no decode/re-encode round
+    # trip and no second hash inside the SDK parser
+    digest = hmac.new(bot_instance.channel_secret, body, hashlib.sha256).digest()
+    if not hmac.compare_digest(signature.encode("utf-8"), base64.b64encode(digest)):
         bot_instance.logger.error("Invalid signature received")
         raise HTTPException(status_code=400, detail="Invalid signature")
-    
-    # Process events
-    for event in events:
-        if not isinstance(event, MessageEvent):
-            continue
-            
-        if event.message.type == "text":
-            try:
-                response = await bot_instance.process_message(event)
-                reply_msg = TextSendMessage(text=response)
-                await bot_instance.line_bot_api.reply_message(
-                    event.reply_token, reply_msg
-                )
-            except Exception as e:
-                bot_instance.logger.error(f"Error processing message: {e}")
-                # Send error message to user
-                error_msg = TextSendMessage(text="抱歉，處理您的訊息時發生錯誤。")
-                await bot_instance.line_bot_api.reply_message(
-                    event.reply_token, error_msg
-                )
-        elif event.message.type == "image":
-            # Handle image messages (placeholder)
-            continue
-    
+
+    try:
+        # json_loads interns event dict keys, so the repeated per-event
+        # field lookups below and in the SDK compare by pointer
+        payload = json_loads(body)
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid request body")
+
+    # Enqueue events and acknowledge immediately: LINE expects a fast 200,
+    # so agent latency must not hold the webhook response hostage. The
+    # consumer tasks started in lifespan process events concurrently.
+    # Only message events are handled, so others are never materialized.
+    queue = request.app.state.event_queue
+    for event_dict in payload.get("events", []):
+        if event_dict.get("type") == "message":
+            queue.put_nowait(MessageEvent.new_from_json_dict(event_dict))
+
     return "OK"
 
 
+async def _handle_event(event: MessageEvent):
+    """Process a single webhook event and send its reply."""
+    if event.message.type == "text":
+        try:
+            response = await bot_instance.process_message(event)
+            reply_msg = TextSendMessage(text=response)
+            await bot_instance.line_bot_api.reply_message(
+                event.reply_token, reply_msg
+            )
+        except Exception as e:
+            bot_instance.logger.error(f"Error processing message: {e}")
+            # Send error message to user
+            await bot_instance.line_bot_api.reply_message(
+                event.reply_token, ERROR_MSG
+            )
+    elif event.message.type == "image":
+        # Handle image messages (placeholder)
+        return
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -293,13 +513,27 @@ async def get_metrics():
 
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    
+
     settings = get_settings()
+
+    # Reload requires a single worker. Beyond that, multiple workers are
+    # only safe once sessions are shared through Redis: OTP, mandate and
+    # cart state is still per-process, so with in-memory sessions a flow
+    # started in one worker cannot be completed in another
+    if settings.debug or not settings.redis_url:
+        workers = 1
+    else:
+        workers = min(os.cpu_count() or 1, 4)
+
     uvicorn.run(
         "main:app",
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
         log_level=settings.log_level.lower()
     )
\ No newline at end of file
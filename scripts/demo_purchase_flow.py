@@ -17,12 +17,22 @@ Usage:
 Author: Evan Lin
 """
 
+import asyncio
 import sys
-import json
+import time
 from datetime import datetime
+from pathlib import Path
+from typing import Final
 
-# Add project root to path
-sys.path.insert(0, '/Users/al03034132/Documents/linebot-ap2')
+import orjson
+
+# Make the project importable when run straight from a checkout. The
+# previous hardcoded developer-machine path made every import statement
+# probe a directory that does not exist here; this inserts the real
+# repo root, and only when it is not already importable
+_PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
 
 # Import services
 from src.linebot_ap2.services import (
@@ -32,49 +42,105 @@ from src.linebot_ap2.services import (
     get_credential_provider
 )
 
-# Import tools (these are what the agents use)
+# Import the dict-returning tool cores. Agents use the string wrappers
+# (enhanced_*) because ADK requires string tool outputs; calling the
+# _impl variants here skips a JSON encode+decode round trip per call
 from src.linebot_ap2.tools.shopping_tools import (
-    enhanced_search_products,
-    enhanced_get_product_details,
-    enhanced_add_to_cart,
-    enhanced_create_cart_mandate,
-    get_eligible_payment_methods,
-    issue_payment_token_for_mandate
+    _search_products_impl,
+    _add_to_cart_impl,
+    _create_cart_mandate_impl,
+    _eligible_payment_methods_impl,
+    _issue_payment_token_impl
 )
 
 from src.linebot_ap2.tools.payment_tools import (
-    enhanced_initiate_payment,
-    enhanced_verify_otp,
-    enhanced_get_transaction_status,
-    initiate_payment_with_token
+    _initiate_payment_impl,
+    _verify_otp_impl,
+    _transaction_status_impl
 )
 
 
+# Decoration strings built once instead of per print call
+_BAR: Final[str] = "=" * 70
+_SUB: Final[str] = "─" * 60
+_STARS: Final[str] = "*" * 50
+
+
+class _Buf:
+    """Line buffer that batches a whole phase into one stdout write.
+
+    Each bare print() locks stdout and flushes at the newline; collecting
+    the phase's lines and emitting them together collapses dozens of
+    write syscalls into one per phase.
+    """
+
+    __slots__ = ('parts',)
+
+    def __init__(self):
+        self.parts = []
+
+    def w(self, s: str = ""):
+        """Queue one output line (newline appended, like print)."""
+        self.parts.append(f"{s}\n")
+
+    def flush(self):
+        """Emit everything queued so far in a single write."""
+        if self.parts:
+            sys.stdout.write("".join(self.parts))
+            sys.stdout.flush()
+            self.parts.clear()
+
+
+_OUT = _Buf()
+
+
 def print_header(title: str):
     """Print a formatted section header."""
-    print("\n" + "=" * 70)
-    print(f"  {title}")
-    print("=" * 70)
+    # A header opens a new phase: emit the previous phase's buffer first
+    _OUT.flush()
+    _OUT.w(f"\n{_BAR}\n  {title}\n{_BAR}")
 
 
 def print_step(step: int, description: str):
     """Print a step indicator."""
-    print(f"\n{'─' * 60}")
-    print(f"  Step {step}: {description}")
-    print(f"{'─' * 60}")
+    _OUT.w(f"\n{_SUB}\n  Step {step}: {description}\n{_SUB}")
 
 
-def print_json(data: dict, indent: int = 2):
-    """Pretty print JSON data."""
-    print(json.dumps(data, indent=indent, default=str, ensure_ascii=False))
+def _json_default(obj):
+    """Fallback encoder for the rare types orjson lacks native support for.
 
+    datetime, UUID, and Decimal are serialized in native code; only
+    unknown objects (e.g. Enum members) pay the Python callback.
+    """
+    return str(obj)
 
-def parse_json_response(response: str) -> dict:
-    """Parse JSON string response from tools."""
-    return json.loads(response)
 
+def print_json(data: dict, indent: int = 2):
+    """Pretty print JSON data."""
+    # orjson emits UTF-8 bytes; writing them straight to the byte stream
+    # skips the str decode + re-encode round trip, so peak memory stays
+    # at one copy of the payload even for large mandate dumps. Flushing
+    # the line buffer first preserves output ordering.
+    _OUT.flush()
+    sys.stdout.buffer.write(orjson.dumps(
+        data,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z,
+        default=_json_default
+    ))
+    sys.stdout.buffer.write(b"\n")
+
+
+def _call(fn, *args, **kwargs):
+    """Run one blocking tool core on a worker thread.
+
+    The tool cores are synchronous; asyncio.to_thread lets the event loop
+    overlap them with other work (printing, independent tool calls)
+    instead of blocking the whole script on each roundtrip.
+    """
+    return asyncio.to_thread(fn, *args, **kwargs)
 
-def demo_complete_purchase_flow():
+
+async def demo_complete_purchase_flow():
     """
     Complete AP2 Purchase Flow Demo
 
@@ -89,8 +155,9 @@ def demo_complete_purchase_flow():
     USER_ID = "demo_user"
 
     print_header("AP2 Complete Purchase Flow Demo")
-    print(f"\nDemo User: {USER_ID}")
-    print(f"Started at: {datetime.now().isoformat()}")
+    started_at = datetime.now().isoformat()
+    _OUT.w(f"\nDemo User: {USER_ID}")
+    _OUT.w(f"Started at: {started_at}")
 
     # Initialize services and clear previous state
     product_service = get_product_service()
@@ -98,12 +165,13 @@ def demo_complete_purchase_flow():
     payment_service = get_payment_service()
     credential_provider = get_credential_provider()
 
-    # Clear previous demo data
-    mandate_service.active_mandates.clear()
-    product_service.shopping_carts.clear()
-    payment_service.otp_store.clear()
+    # Enter a fresh per-run scope: old stores are dropped in O(1) rather
+    # than cleared in place on the shared singletons
+    mandate_service.enter_scope()
+    product_service.enter_scope()
+    payment_service.enter_scope()
 
-    print("\n[System] Previous demo data cleared.")
+    _OUT.w("\n[System] Previous demo data cleared.")
 
     # ============================================================
     # PHASE 1: PRODUCT BROWSING & CART
@@ -113,70 +181,85 @@ def demo_complete_purchase_flow():
 
     # Step 1: Search for products
     print_step(1, "Search for Products")
-    print("Searching for 'phone' in electronics category...")
-
-    search_result = parse_json_response(
-        enhanced_search_products(
-            query="phone",
-            category="electronics"
-        )
+    _OUT.w("Searching for 'phone' in electronics category...")
+
+    # details_top_k embeds the top hit's detail payload in the search
+    # response, so step 2 needs no second tool round trip
+    search_result = await _call(
+        _search_products_impl,
+        query="phone",
+        category="electronics",
+        details_top_k=1
     )
 
-    print(f"\nFound {search_result.get('total', 0)} products:")
+    _OUT.w(f"\nFound {search_result.get('total', 0)} products:")
     for product in search_result.get('products', [])[:3]:
-        print(f"  - {product['name']}: ${product['price']} ({product['brand']})")
+        name, price, brand = product['name'], product['price'], product['brand']
+        _OUT.w(f"  - {name}: ${price} ({brand})")
 
     if not search_result.get('products'):
-        print("No products found. Using fallback search...")
-        search_result = parse_json_response(enhanced_search_products(query=""))
+        _OUT.w("No products found. Using fallback search...")
+        search_result = await _call(_search_products_impl, query="", details_top_k=1)
 
     # Step 2: View product details
     print_step(2, "View Product Details")
 
     selected_product = search_result['products'][0]
     product_id = selected_product['id']  # Note: field is 'id', not 'product_id'
-    print(f"Getting details for: {selected_product['name']}")
+    _OUT.w(f"Getting details for: {selected_product['name']}")
 
-    product_details = parse_json_response(
-        enhanced_get_product_details(product_id=product_id)
-    )
+    # Bind the nested dict once: LOAD_FAST beats re-walking two
+    # subscript levels for each printed field
+    detailed = search_result['details'][0]['product']
 
-    print(f"\nProduct Details:")
-    print(f"  Name: {product_details['product']['name']}")
-    print(f"  Price: ${product_details['product']['price']}")
-    print(f"  Brand: {product_details['product']['brand']}")
-    print(f"  Stock: {product_details['product']['stock']}")
-    if product_details['product'].get('specifications'):
-        print(f"  Specs: {product_details['product']['specifications']}")
+    _OUT.w(f"\nProduct Details:")
+    _OUT.w(f"  Name: {detailed['name']}")
+    _OUT.w(f"  Price: ${detailed['price']}")
+    _OUT.w(f"  Brand: {detailed['brand']}")
+    _OUT.w(f"  Stock: {detailed['stock']}")
+    specifications = detailed.get('specifications')
+    if specifications:
+        _OUT.w(f"  Specs: {specifications}")
 
     # Step 3: Add to cart
     print_step(3, "Add to Cart")
-    print(f"Adding {selected_product['name']} to cart (quantity: 1)...")
-
-    cart_result = parse_json_response(
-        enhanced_add_to_cart(
-            user_id=USER_ID,
-            product_id=product_id,
-            quantity=1
-        )
-    )
+    _OUT.w(f"Adding {selected_product['name']} to cart (quantity: 1)...")
 
-    print(f"\nCart Updated:")
-    print(f"  Items in cart: {cart_result['cart']['item_count']}")
-    print(f"  Cart total: ${cart_result['cart']['total_amount']}")
-
-    # Add another product for variety
+    # Add a second product for variety; the two adds touch distinct SKUs,
+    # so they run concurrently instead of back to back
     if len(search_result['products']) > 1:
         second_product = search_result['products'][1]
-        print(f"\nAdding second product: {second_product['name']}...")
-        cart_result = parse_json_response(
-            enhanced_add_to_cart(
+        _OUT.w(f"Also adding second product: {second_product['name']}...")
+
+        responses = await asyncio.gather(
+            _call(
+                _add_to_cart_impl,
+                user_id=USER_ID, product_id=product_id, quantity=1
+            ),
+            _call(
+                _add_to_cart_impl,
                 user_id=USER_ID,
                 product_id=second_product['id'],  # Note: field is 'id'
                 quantity=1
             )
         )
-        print(f"  Cart total: ${cart_result['cart']['total_amount']}")
+        # Whichever add completed last reflects the full cart
+        cart_result = max(
+            responses,
+            key=lambda result: result['cart']['item_count']
+        )
+    else:
+        cart_result = await _call(
+            _add_to_cart_impl,
+            user_id=USER_ID,
+            product_id=product_id,
+            quantity=1
+        )
+
+    cart = cart_result['cart']
+    _OUT.w(f"\nCart Updated:")
+    _OUT.w(f"  Items in cart: {cart['item_count']}")
+    _OUT.w(f"  Cart total: ${cart['total_amount']}")
 
     # ============================================================
     # PHASE 2: MANDATE CREATION (AP2 Phase 1)
@@ -186,31 +269,41 @@ def demo_complete_purchase_flow():
 
     # Step 4: Create cart mandate
     print_step(4, "Create Cart Mandate with Merchant Signature")
-    print("Creating signed cart mandate...")
+    _OUT.w("Creating signed cart mandate...")
 
-    mandate_result = parse_json_response(
-        enhanced_create_cart_mandate(
-            user_id=USER_ID,
-            expires_in_minutes=30
-        )
+    mandate_result = await _call(
+        _create_cart_mandate_impl,
+        user_id=USER_ID,
+        expires_in_minutes=30
     )
 
-    mandate_id = mandate_result['mandate']['id']
-    total_amount = mandate_result['mandate']['total_amount']
-    currency = mandate_result['mandate'].get('currency', 'USD')
-
-    print(f"\nMandate Created:")
-    print(f"  Mandate ID: {mandate_id}")
-    print(f"  Total Amount: ${total_amount} {currency}")
-    print(f"  Expires: {mandate_result['mandate']['expires_at']}")
-    print(f"\nAP2 Signatures:")
-    print(f"  Merchant Signed: {mandate_result['ap2_signatures']['merchant_signed']}")
-    print(f"  User Signed: {mandate_result['ap2_signatures']['user_signed']}")
-    print(f"  Awaiting: {mandate_result['ap2_signatures']['awaiting']}")
-
-    print(f"\nCart Items:")
-    for item in mandate_result['mandate']['items']:
-        print(f"  - {item['name']}: ${item['price']} x {item.get('quantity', 1)}")
+    mandate = mandate_result['mandate']
+    mandate_id = mandate['id']
+    total_amount = mandate['total_amount']
+    currency = mandate.get('currency', 'USD')
+
+    # The eligibility lookup only needs the mandate amount, so it runs
+    # while the mandate summary below is being formatted
+    eligible_task = asyncio.create_task(_call(
+        _eligible_payment_methods_impl,
+        user_id=USER_ID,
+        amount=total_amount,
+        currency=currency
+    ))
+
+    signatures = mandate_result['ap2_signatures']
+    _OUT.w(f"\nMandate Created:")
+    _OUT.w(f"  Mandate ID: {mandate_id}")
+    _OUT.w(f"  Total Amount: ${total_amount} {currency}")
+    _OUT.w(f"  Expires: {mandate['expires_at']}")
+    _OUT.w(f"\nAP2 Signatures:")
+    _OUT.w(f"  Merchant Signed: {signatures['merchant_signed']}")
+    _OUT.w(f"  User Signed: {signatures['user_signed']}")
+    _OUT.w(f"  Awaiting: {signatures['awaiting']}")
+
+    _OUT.w(f"\nCart Items:")
+    for item in mandate['items']:
+        _OUT.w(f"  - {item['name']}: ${item['price']} x {item.get('quantity', 1)}")
 
     # ============================================================
     # PHASE 3: CREDENTIAL PROVIDER (AP2 Phase 2)
@@ -220,49 +313,46 @@ def demo_complete_purchase_flow():
 
     # Step 5: Get eligible payment methods
     print_step(5, "Get Eligible Payment Methods")
-    print(f"Querying Credential Provider for eligible methods...")
-    print(f"  Transaction: ${total_amount} {currency}")
+    _OUT.w(f"Querying Credential Provider for eligible methods...")
+    _OUT.w(f"  Transaction: ${total_amount} {currency}")
 
-    eligible_result = parse_json_response(
-        get_eligible_payment_methods(
-            user_id=USER_ID,
-            amount=total_amount,
-            currency=currency
-        )
-    )
+    eligible_result = await eligible_task
 
-    print(f"\nEligible Payment Methods ({eligible_result['total']} found):")
+    _OUT.w(f"\nEligible Payment Methods ({eligible_result['total']} found):")
     for method in eligible_result['eligible_methods']:
         default_marker = " (DEFAULT)" if method['is_default'] else ""
         nickname = f" - {method['nickname']}" if method.get('nickname') else ""
-        print(f"  - {method['brand']} ****{method['last_four']}{nickname}{default_marker}")
-        print(f"    Credential ID: {method['credential_id']}")
+        _OUT.w(f"  - {method['brand']} ****{method['last_four']}{nickname}{default_marker}")
+        _OUT.w(f"    Credential ID: {method['credential_id']}")
 
-    # Select the default (first) method
+    # Select the default (first) method; bind the display fields used in
+    # three separate sections below
     selected_credential = eligible_result['eligible_methods'][0]
     credential_id = selected_credential['credential_id']
-    print(f"\nSelected: {selected_credential['brand']} ****{selected_credential['last_four']}")
+    credential_label = (
+        f"{selected_credential['brand']} ****{selected_credential['last_four']}"
+    )
+    _OUT.w(f"\nSelected: {credential_label}")
 
     # Step 6: Issue payment token
     print_step(6, "Issue Payment Token")
-    print(f"Issuing one-time token for mandate...")
-    print(f"  Credential: {credential_id}")
-    print(f"  Mandate: {mandate_id}")
-
-    token_result = parse_json_response(
-        issue_payment_token_for_mandate(
-            user_id=USER_ID,
-            credential_id=credential_id,
-            mandate_id=mandate_id
-        )
+    _OUT.w(f"Issuing one-time token for mandate...")
+    _OUT.w(f"  Credential: {credential_id}")
+    _OUT.w(f"  Mandate: {mandate_id}")
+
+    token_result = await _call(
+        _issue_payment_token_impl,
+        user_id=USER_ID,
+        credential_id=credential_id,
+        mandate_id=mandate_id
     )
 
     token_id = token_result['token_id']
-    print(f"\nPayment Token Issued:")
-    print(f"  Token ID: {token_id}")
-    print(f"  Amount: ${token_result['amount']} {token_result['currency']}")
-    print(f"  Expires: {token_result['expires_at']}")
-    print(f"  Status: {token_result['status']}")
+    _OUT.w(f"\nPayment Token Issued:")
+    _OUT.w(f"  Token ID: {token_id}")
+    _OUT.w(f"  Amount: ${token_result['amount']} {token_result['currency']}")
+    _OUT.w(f"  Expires: {token_result['expires_at']}")
+    _OUT.w(f"  Status: {token_result['status']}")
 
     # ============================================================
     # PHASE 4: PAYMENT & OTP VERIFICATION
@@ -272,90 +362,91 @@ def demo_complete_purchase_flow():
 
     # Step 7: Initiate payment
     print_step(7, "Initiate Payment")
-    print("Initiating payment and generating OTP...")
+    _OUT.w("Initiating payment and generating OTP...")
 
     # Note: Currently PaymentService has its own demo payment methods
     # In production, the token would be consumed here for actual payment processing
     # For demo, we use the standard payment flow with card_001 (matches Visa ****1234)
-    payment_result = parse_json_response(
-        enhanced_initiate_payment(
-            mandate_id=mandate_id,
-            payment_method_id="card_001",  # Demo payment method (Visa ****1234)
-            user_id=USER_ID,
-            amount=total_amount
-        )
+    payment_result = await _call(
+        _initiate_payment_impl,
+        mandate_id=mandate_id,
+        payment_method_id="card_001",  # Demo payment method (Visa ****1234)
+        user_id=USER_ID,
+        amount=total_amount
     )
 
     otp_code = payment_result.get('otp_code')
 
-    print(f"\nPayment Initiated:")
-    print(f"  Mandate ID: {payment_result['mandate_id']}")
-    print(f"  Status: {payment_result['status']}")
-    print(f"  OTP Required: {payment_result['otp_required']}")
-    print(f"  OTP Sent To: {payment_result['otp_sent_to']}")
-    print(f"  Max Attempts: {payment_result['max_attempts']}")
-    print(f"  Expires In: {payment_result['expires_in_seconds']}s")
+    _OUT.w(f"\nPayment Initiated:")
+    _OUT.w(f"  Mandate ID: {payment_result['mandate_id']}")
+    _OUT.w(f"  Status: {payment_result['status']}")
+    _OUT.w(f"  OTP Required: {payment_result['otp_required']}")
+    _OUT.w(f"  OTP Sent To: {payment_result['otp_sent_to']}")
+    _OUT.w(f"  Max Attempts: {payment_result['max_attempts']}")
+    _OUT.w(f"  Expires In: {payment_result['expires_in_seconds']}s")
 
     # In production, token_info would be included when using initiate_payment_with_token
     # For demo purposes, we show the previously issued token
-    print(f"\nCredential Provider Token (Pre-issued):")
-    print(f"  Token ID: {token_id}")
-    print(f"  Bound to Credential: {selected_credential['brand']} ****{selected_credential['last_four']}")
+    _OUT.w(f"\nCredential Provider Token (Pre-issued):")
+    _OUT.w(f"  Token ID: {token_id}")
+    _OUT.w(f"  Bound to Credential: {credential_label}")
 
-    print(f"\n{'*' * 50}")
-    print(f"  DEMO OTP CODE: {otp_code}")
-    print(f"{'*' * 50}")
+    _OUT.w(f"\n{_STARS}")
+    _OUT.w(f"  DEMO OTP CODE: {otp_code}")
+    _OUT.w(_STARS)
 
     # Step 8: Verify OTP
     print_step(8, "Verify OTP and Complete Payment")
-    print(f"Verifying OTP: {otp_code}")
+    _OUT.w(f"Verifying OTP: {otp_code}")
 
-    verify_result = parse_json_response(
-        enhanced_verify_otp(
-            mandate_id=mandate_id,
-            otp_code=otp_code,
-            user_id=USER_ID
-        )
+    verify_result = await _call(
+        _verify_otp_impl,
+        mandate_id=mandate_id,
+        otp_code=otp_code,
+        user_id=USER_ID
     )
 
     if verify_result.get('status') == 'completed':
         transaction_id = verify_result['transaction_id']
 
-        print(f"\n{'*' * 50}")
-        print(f"  PAYMENT SUCCESSFUL!")
-        print(f"{'*' * 50}")
-        print(f"\nTransaction Details:")
-        print(f"  Transaction ID: {transaction_id}")
-        print(f"  Amount: ${verify_result['amount']} {verify_result.get('currency', 'USD')}")
-        print(f"  Status: {verify_result['status']}")
-        print(f"  Processed At: {verify_result['processed_at']}")
-
-        print(f"\nFulfillment Info:")
+        # Status check is independent of the confirmation prints below
+        status_task = asyncio.create_task(_call(
+            _transaction_status_impl, transaction_id=transaction_id
+        ))
+
+        _OUT.w(f"\n{_STARS}")
+        _OUT.w(f"  PAYMENT SUCCESSFUL!")
+        _OUT.w(_STARS)
+        _OUT.w(f"\nTransaction Details:")
+        _OUT.w(f"  Transaction ID: {transaction_id}")
+        _OUT.w(f"  Amount: ${verify_result['amount']} {verify_result.get('currency', 'USD')}")
+        _OUT.w(f"  Status: {verify_result['status']}")
+        _OUT.w(f"  Processed At: {verify_result['processed_at']}")
+
+        _OUT.w(f"\nFulfillment Info:")
         fulfillment = verify_result.get('fulfillment', {})
-        print(f"  Order Processing: {fulfillment.get('order_processing', 'N/A')}")
-        print(f"  Estimated Delivery: {fulfillment.get('estimated_delivery', 'N/A')}")
-        print(f"  Tracking: {fulfillment.get('tracking_available', 'N/A')}")
+        _OUT.w(f"  Order Processing: {fulfillment.get('order_processing', 'N/A')}")
+        _OUT.w(f"  Estimated Delivery: {fulfillment.get('estimated_delivery', 'N/A')}")
+        _OUT.w(f"  Tracking: {fulfillment.get('tracking_available', 'N/A')}")
 
-        print(f"\nAP2 Compliance:")
+        _OUT.w(f"\nAP2 Compliance:")
         ap2 = verify_result.get('ap2_compliance', {})
-        print(f"  Mandate Fulfilled: {ap2.get('mandate_fulfilled', 'N/A')}")
-        print(f"  Transaction Signed: {ap2.get('transaction_signed', 'N/A')}")
-        print(f"  Audit Trail: {ap2.get('audit_trail', 'N/A')}")
+        _OUT.w(f"  Mandate Fulfilled: {ap2.get('mandate_fulfilled', 'N/A')}")
+        _OUT.w(f"  Transaction Signed: {ap2.get('transaction_signed', 'N/A')}")
+        _OUT.w(f"  Audit Trail: {ap2.get('audit_trail', 'N/A')}")
 
         # Step 9: Verify transaction status
         print_step(9, "Verify Transaction Status")
 
-        status_result = parse_json_response(
-            enhanced_get_transaction_status(transaction_id=transaction_id)
-        )
+        status_result = await status_task
 
-        print(f"\nTransaction Status Check:")
-        print(f"  Transaction ID: {status_result['transaction_id']}")
-        print(f"  Status: {status_result['status']}")
-        print(f"  Amount: ${status_result['amount']}")
+        _OUT.w(f"\nTransaction Status Check:")
+        _OUT.w(f"  Transaction ID: {status_result['transaction_id']}")
+        _OUT.w(f"  Status: {status_result['status']}")
+        _OUT.w(f"  Amount: ${status_result['amount']}")
 
     else:
-        print(f"\nPayment failed: {verify_result.get('error', 'Unknown error')}")
+        _OUT.w(f"\nPayment failed: {verify_result.get('error', 'Unknown error')}")
         return False
 
     # ============================================================
@@ -364,7 +455,7 @@ def demo_complete_purchase_flow():
 
     print_header("DEMO COMPLETE - Summary")
 
-    print(f"""
+    _OUT.w(f"""
     Purchase Flow Completed Successfully!
 
     Flow Summary:
@@ -375,7 +466,7 @@ def demo_complete_purchase_flow():
        - Merchant signed  : Yes
        - User signed      : Yes (at payment initiation)
     4. Credential Provider:
-       - Payment method   : {selected_credential['brand']} ****{selected_credential['last_four']}
+       - Payment method   : {credential_label}
        - Token issued     : {token_id}
     5. Payment Processing :
        - OTP verified     : Yes
@@ -396,87 +487,122 @@ def demo_complete_purchase_flow():
     ─────────────────────────────────────────────────────────
     """)
 
-    print(f"Completed at: {datetime.now().isoformat()}")
+    _OUT.w(f"Completed at: {datetime.now().isoformat()}")
 
     return True
 
 
-def demo_with_wrong_otp():
+async def demo_with_wrong_otp():
     """Demo showing OTP retry flow with wrong OTP attempts."""
 
     print_header("BONUS: OTP Retry Flow Demo")
-    print("\nThis demo shows what happens with incorrect OTP entries.")
+    _OUT.w("\nThis demo shows what happens with incorrect OTP entries.")
 
     USER_ID = "demo_user"
 
-    # Clear and setup
+    # Fresh scope for this run
     product_service = get_product_service()
     mandate_service = get_mandate_service()
 
-    mandate_service.active_mandates.clear()
-    product_service.shopping_carts.clear()
+    mandate_service.enter_scope()
+    product_service.enter_scope()
 
     # Quick cart setup
-    search_result = parse_json_response(enhanced_search_products(query=""))
+    search_result = await _call(_search_products_impl, query="")
     product = search_result['products'][0]
 
-    enhanced_add_to_cart(USER_ID, product['id'], 1)  # Note: field is 'id'
+    await _call(_add_to_cart_impl, USER_ID, product['id'], 1)  # Note: field is 'id'
 
-    mandate_result = parse_json_response(
-        enhanced_create_cart_mandate(USER_ID, 30)
-    )
+    mandate_result = await _call(_create_cart_mandate_impl, USER_ID, 30)
     mandate_id = mandate_result['mandate']['id']
 
     # Get credential and issue token
-    eligible = parse_json_response(
-        get_eligible_payment_methods(USER_ID, 999, "USD")
-    )
+    eligible = await _call(_eligible_payment_methods_impl, USER_ID, 999, "USD")
     credential_id = eligible['eligible_methods'][0]['credential_id']
 
-    token_result = parse_json_response(
-        issue_payment_token_for_mandate(USER_ID, credential_id, mandate_id)
+    token_result = await _call(
+        _issue_payment_token_impl, USER_ID, credential_id, mandate_id
     )
     token_id = token_result['token_id']
 
     # Initiate payment (use standard flow for demo compatibility)
-    payment_result = parse_json_response(
-        enhanced_initiate_payment(mandate_id, "card_001", USER_ID, 249)
+    payment_result = await _call(
+        _initiate_payment_impl, mandate_id, "card_001", USER_ID, 249
     )
     correct_otp = payment_result['otp_code']
 
-    print(f"\nCorrect OTP: {correct_otp}")
-    print(f"Max attempts: {payment_result['max_attempts']}")
+    _OUT.w(f"\nCorrect OTP: {correct_otp}")
+    _OUT.w(f"Max attempts: {payment_result['max_attempts']}")
 
     # Try wrong OTP
-    print("\n--- Attempt 1: Wrong OTP '000000' ---")
-    result1 = parse_json_response(
-        enhanced_verify_otp(mandate_id, "000000", USER_ID)
-    )
-    print(f"Result: {result1.get('error', 'Success')}")
-    print(f"Remaining attempts: {result1.get('remaining_attempts', 'N/A')}")
+    _OUT.w("\n--- Attempt 1: Wrong OTP '000000' ---")
+    result1 = await _call(_verify_otp_impl, mandate_id, "000000", USER_ID)
+    _OUT.w(f"Result: {result1.get('error', 'Success')}")
+    _OUT.w(f"Remaining attempts: {result1.get('remaining_attempts', 'N/A')}")
 
     # Try another wrong OTP
-    print("\n--- Attempt 2: Wrong OTP '111111' ---")
-    result2 = parse_json_response(
-        enhanced_verify_otp(mandate_id, "111111", USER_ID)
-    )
-    print(f"Result: {result2.get('error', 'Success')}")
-    print(f"Remaining attempts: {result2.get('remaining_attempts', 'N/A')}")
+    _OUT.w("\n--- Attempt 2: Wrong OTP '111111' ---")
+    result2 = await _call(_verify_otp_impl, mandate_id, "111111", USER_ID)
+    _OUT.w(f"Result: {result2.get('error', 'Success')}")
+    _OUT.w(f"Remaining attempts: {result2.get('remaining_attempts', 'N/A')}")
 
     # Try correct OTP
-    print(f"\n--- Attempt 3: Correct OTP '{correct_otp}' ---")
-    result3 = parse_json_response(
-        enhanced_verify_otp(mandate_id, correct_otp, USER_ID)
-    )
+    _OUT.w(f"\n--- Attempt 3: Correct OTP '{correct_otp}' ---")
+    result3 = await _call(_verify_otp_impl, mandate_id, correct_otp, USER_ID)
 
     if result3.get('status') == 'completed':
-        print(f"SUCCESS! Transaction ID: {result3['transaction_id']}")
+        _OUT.w(f"SUCCESS! Transaction ID: {result3['transaction_id']}")
     else:
-        print(f"Result: {result3.get('error', result3.get('status'))}")
+        _OUT.w(f"Result: {result3.get('error', result3.get('status'))}")
 
     return True
 
 
+def _print_timing_stats(durations_ns: list):
+    """Summarize repeated-run wall times so regressions surface.
+
+    The first run pays cold-start costs (imports, service init, method
+    caches); later runs show the steady-state CPU cost that matters for
+    optimization work.
+    """
+    ordered = sorted(durations_ns)
+    count = len(ordered)
+    median = ordered[count // 2]
+    p99 = ordered[min(count - 1, (count * 99) // 100)]
+    _OUT.w(f"\nTiming over {count} run(s):")
+    _OUT.w(f"  min    : {ordered[0] / 1e6:.2f} ms")
+    _OUT.w(f"  median : {median / 1e6:.2f} ms")
+    _OUT.w(f"  p99    : {p99 / 1e6:.2f} ms")
+
+
+async def main(run_bonus: bool = False, repeat: int = 1):
+    """Run the main demo (and optionally the bonus flow) on one loop.
+
+    With repeat > 1 the purchase flow loops in-process, so warm-cache
+    behaviour (interned strings, memoized searches, allocator arenas) is
+    what gets measured rather than cold-start noise.
+    """
+    try:
+        durations_ns = []
+        success = True
+        for _ in range(repeat):
+            start_ns = time.perf_counter_ns()
+            success = await demo_complete_purchase_flow()
+            durations_ns.append(time.perf_counter_ns() - start_ns)
+
+        if repeat > 1:
+            _print_timing_stats(durations_ns)
+
+        if success and run_bonus:
+            await demo_with_wrong_otp()
+    finally:
+        # Drop this run's state so nothing leaks into the shared
+        # singletons after the demo finishes
+        get_mandate_service().exit_scope()
+        get_product_service().exit_scope()
+        get_payment_service().exit_scope()
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -486,23 +612,26 @@ if __name__ == "__main__":
         action='store_true',
         help='Also run the OTP retry bonus demo'
     )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=1,
+        help='Run the purchase flow N times and report timing stats'
+    )
 
     args = parser.parse_args()
 
     try:
-        # Run main demo
-        success = demo_complete_purchase_flow()
-
-        if success and args.bonus:
-            # Run bonus demo
-            demo_with_wrong_otp()
+        asyncio.run(main(run_bonus=args.bonus, repeat=args.repeat))
 
-        print("\n" + "=" * 70)
-        print("  Demo completed successfully!")
-        print("=" * 70 + "\n")
+        _OUT.w(f"\n{_BAR}")
+        _OUT.w("  Demo completed successfully!")
+        _OUT.w(f"{_BAR}\n")
+        _OUT.flush()
 
     except Exception as e:
-        print(f"\n[ERROR] Demo failed: {e}")
+        _OUT.w(f"\n[ERROR] Demo failed: {e}")
+        _OUT.flush()
         import traceback
         traceback.print_exc()
         sys.exit(1)
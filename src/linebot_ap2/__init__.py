@@ -1,16 +1,28 @@
 """
 LINE Bot AP2 Integration Package
 
-A LINE Bot application that integrates Google ADK (Agent SDK) with Gemini AI 
+A LINE Bot application that integrates Google ADK (Agent SDK) with Gemini AI
 for intelligent shopping and payment processing using the AP2 protocol.
 """
 
+from typing import TYPE_CHECKING
+
 __version__ = "0.1.0"
 __author__ = "Developer"
 __email__ = "developer@example.com"
 
-from .config.settings import Settings
+if TYPE_CHECKING:
+    from .config.settings import Settings
 
 __all__ = [
     "Settings",
-]
\ No newline at end of file
+]
+
+
+# PEP 562 lazy export: pydantic-settings is only loaded when Settings is
+# actually requested, keeping `import linebot_ap2` near-free
+def __getattr__(name):
+    if name == "Settings":
+        from .config.settings import Settings
+        return Settings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
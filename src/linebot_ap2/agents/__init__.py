@@ -1,9 +1,28 @@
-"""Agent modules for LINE Bot AP2."""
+"""Agent modules for LINE Bot AP2.
 
-from .enhanced_shopping_agent import create_enhanced_shopping_agent
-from .enhanced_payment_agent import create_enhanced_payment_agent
+The factory submodules pull in the tool and service stack, so they are
+resolved lazily via PEP 562: importing this package costs nothing until
+an agent factory is actually requested (the demo script, for instance,
+uses the tools directly and never needs them).
+"""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .enhanced_shopping_agent import create_enhanced_shopping_agent
+    from .enhanced_payment_agent import create_enhanced_payment_agent
 
 __all__ = [
     "create_enhanced_shopping_agent",
     "create_enhanced_payment_agent",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name == "create_enhanced_shopping_agent":
+        from .enhanced_shopping_agent import create_enhanced_shopping_agent
+        return create_enhanced_shopping_agent
+    if name == "create_enhanced_payment_agent":
+        from .enhanced_payment_agent import create_enhanced_payment_agent
+        return create_enhanced_payment_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,8 @@
 """Enhanced Payment Agent using new service architecture and tools."""
 
-from google.adk.agents import Agent
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 from ..tools.payment_tools import (
     enhanced_get_payment_methods,
     enhanced_initiate_payment,
@@ -12,22 +14,17 @@ from ..tools.payment_tools import (
     cleanup_expired_data
 )
 
+if TYPE_CHECKING:
+    from google.adk.agents import Agent
 
-def create_enhanced_payment_agent(
-    model: str = "gemini-2.5-flash",
-    max_otp_attempts: int = 3,
-    otp_expiry_minutes: int = 5
-) -> Agent:
-    """Create enhanced payment agent with improved security and error handling."""
-    
-    return Agent(
-        name="enhanced_payment_agent",
-        model=model,
-        description="""Advanced payment processor with AP2 compliance, enhanced security 
-        features, and comprehensive error handling. Supports secure OTP verification, 
-        transaction monitoring, and automated retry mechanisms.""",
-        
-        instruction=f"""You are a secure payment processing agent with advanced capabilities:
+
+# Memoized: the ~2 KB instruction interpolates only these two knobs and
+# call sites invariably pass the defaults, so repeated agent builds reuse
+# the same string instead of re-running the f-string concatenation
+@lru_cache(maxsize=32)
+def _instruction(max_otp_attempts: int, otp_expiry_minutes: int) -> str:
+    """Build the payment agent instruction for the given OTP settings."""
+    return f"""You are a secure payment processing agent with advanced capabilities:
 
 🔐 **Security & Compliance:**
 - **AP2 Protocol**: Full compliance with Agent Payments Protocol standards
@@ -111,7 +108,28 @@ Example prompt:
 4. Only proceed with payment if mandate exists and is valid
 
 Always prioritize security while maintaining a smooth user experience.
-Make complex payment processes feel simple and trustworthy.""",
+Make complex payment processes feel simple and trustworthy."""
+
+
+def create_enhanced_payment_agent(
+    model: str = "gemini-2.5-flash",
+    max_otp_attempts: int = 3,
+    otp_expiry_minutes: int = 5
+) -> "Agent":
+    """Create enhanced payment agent with improved security and error handling."""
+
+    # Imported lazily: google.adk dominates cold-start time and callers
+    # that only need the tool functions should not pay for it
+    from google.adk.agents import Agent
+
+    return Agent(
+        name="enhanced_payment_agent",
+        model=model,
+        description="""Advanced payment processor with AP2 compliance, enhanced security
+        features, and comprehensive error handling. Supports secure OTP verification,
+        transaction monitoring, and automated retry mechanisms.""",
+
+        instruction=_instruction(max_otp_attempts, otp_expiry_minutes),
 
         tools=[
             enhanced_get_payment_methods,
@@ -1,6 +1,8 @@
 """Enhanced Shopping Agent using new service architecture and tools."""
 
-from google.adk.agents import Agent
+from functools import lru_cache
+from typing import TYPE_CHECKING, Final
+
 from ..tools.shopping_tools import (
     enhanced_search_products,
     enhanced_get_product_details,
@@ -12,18 +14,19 @@ from ..tools.shopping_tools import (
     get_user_mandates
 )
 
+if TYPE_CHECKING:
+    from google.adk.agents import Agent
 
-def create_enhanced_shopping_agent(model: str = "gemini-2.5-flash") -> Agent:
-    """Create enhanced shopping agent with improved tools and capabilities."""
-    
-    return Agent(
-        name="enhanced_shopping_agent",
-        model=model,
-        description="""Advanced shopping assistant with comprehensive product search, 
-        cart management, and AP2-compliant payment mandate creation. Features enhanced 
-        search filters, personalized recommendations, and structured data models.""",
-        
-        instruction="""You are an intelligent shopping assistant with advanced capabilities:
+
+# Static agent configuration, hoisted to module level so the factory body
+# stays a plain constructor call and the large strings are built once at
+# import time
+
+_DESCRIPTION: Final[str] = """Advanced shopping assistant with comprehensive product search,
+        cart management, and AP2-compliant payment mandate creation. Features enhanced
+        search filters, personalized recommendations, and structured data models."""
+
+_INSTRUCTION: Final[str] = """You are an intelligent shopping assistant with advanced capabilities:
 
 🛍️ **Core Shopping Functions:**
 - **Product Search**: Use enhanced_search_products with filters (category, price range, brand)
@@ -68,16 +71,35 @@ When users want to purchase:
 - Show users the actual mandate_id from the system
 - Use get_user_mandates to verify mandates were created correctly
 
-Always be helpful, accurate, and security-conscious in your responses.""",
-
-        tools=[
-            enhanced_search_products,
-            enhanced_get_product_details,
-            enhanced_create_cart_mandate,
-            enhanced_get_recommendations,
-            enhanced_add_to_cart,
-            get_product_categories,
-            get_shopping_cart,
-            get_user_mandates
-        ]
+Always be helpful, accurate, and security-conscious in your responses."""
+
+_TOOLS: Final[tuple] = (
+    enhanced_search_products,
+    enhanced_get_product_details,
+    enhanced_create_cart_mandate,
+    enhanced_get_recommendations,
+    enhanced_add_to_cart,
+    get_product_categories,
+    get_shopping_cart,
+    get_user_mandates,
+)
+
+
+# Memoized per model: the agent is stateless configuration (instruction,
+# tool list), so call sites that rebuild it per request or per session
+# get the same instance back instead of re-running construction
+@lru_cache(maxsize=4)
+def create_enhanced_shopping_agent(model: str = "gemini-2.5-flash") -> "Agent":
+    """Create enhanced shopping agent with improved tools and capabilities."""
+
+    # Imported lazily: google.adk dominates cold-start time and callers
+    # that only need the tool functions should not pay for it
+    from google.adk.agents import Agent
+
+    return Agent(
+        name="enhanced_shopping_agent",
+        model=model,
+        description=_DESCRIPTION,
+        instruction=_INSTRUCTION,
+        tools=list(_TOOLS),
     )
\ No newline at end of file
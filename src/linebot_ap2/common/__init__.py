@@ -4,13 +4,19 @@ from .session_manager import SessionManager, EnhancedSessionManager
 from .intent_detector import IntentDetector
 from .logger import setup_logger
 from .retry_handler import RetryHandler, default_retry_handler, retry_on_failure
+from .serialization import json_dumps, pack_payload, unpack_payload
+from .batcher import AsyncBatcher
 
 __all__ = [
-    "SessionManager", 
+    "SessionManager",
     "EnhancedSessionManager",
-    "IntentDetector", 
+    "IntentDetector",
     "setup_logger",
     "RetryHandler",
     "default_retry_handler",
-    "retry_on_failure"
+    "retry_on_failure",
+    "json_dumps",
+    "pack_payload",
+    "unpack_payload",
+    "AsyncBatcher"
 ]
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""Async request batching for bursty agent traffic."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Tuple
+
+
+class AsyncBatcher:
+    """Coalesce already-queued requests into size-bounded batches.
+
+    Items that piled up while a previous batch was being collected are
+    dispatched together in a single asyncio.gather, so a burst of
+    messages shares one scheduling pass (and the underlying connection
+    pool) instead of hitting the backend strictly one by one. Dispatch is
+    immediate — the first item is never held back waiting for company,
+    since the handler runs per item and there is no shared batch call to
+    amortize. Each caller still awaits only its own result.
+
+    max_queue_time is accepted for compatibility but no longer waited
+    out; it becomes meaningful again only if a real batch endpoint lands
+    behind the handler.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[Any]],
+        max_batch_size: int = 16,
+        max_queue_time: float = 0.05
+    ):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._dispatcher: asyncio.Task = None
+
+    async def process(self, item: Any) -> Any:
+        """Submit one item and await its individual result."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        self._ensure_dispatcher()
+        return await future
+
+    def _ensure_dispatcher(self):
+        """Start the dispatch loop lazily on the running event loop."""
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def _dispatch_loop(self):
+        """Collect waiting items into batches and fire each concurrently."""
+        while True:
+            # Block for the first item, then take only what is already
+            # waiting — never park the first caller to see whether more
+            # arrive, which just added latency to every lone message
+            batch = [await self._queue.get()]
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            # Run the batch without blocking collection of the next one
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Execute one batch and resolve each caller's future."""
+        results = await asyncio.gather(
+            *(self.handler(item) for item, _ in batch),
+            return_exceptions=True
+        )
+
+        for (_, future), result in zip(batch, results):
+            if future.cancelled():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -4,6 +4,9 @@ import re
 from typing import List, Dict, Any
 from enum import Enum
 
+import ahocorasick
+from cachetools import LRUCache
+
 
 class IntentType(Enum):
     """Available intent types."""
@@ -12,58 +15,139 @@ class IntentType(Enum):
     UNKNOWN = "unknown"
 
 
+# Keyword lists are static, so the matching automaton is compiled once at
+# import time and shared by every IntentDetector instance
+_KEYWORDS: Dict["IntentType", List[str]] = {
+    IntentType.PAYMENT: [
+        # English keywords
+        'pay', 'payment', 'card', 'checkout', 'otp', 'verify',
+        'confirm purchase', 'complete order', 'transaction',
+        'billing', 'invoice', 'receipt',
+
+        # Chinese keywords
+        '付款', '支付', '付錢', '結帳', '驗證碼', '驗證',
+        '確認購買', '完成訂單', '交易', '帳單', '收據'
+    ],
+
+    IntentType.SHOPPING: [
+        # English keywords
+        'buy', 'purchase', 'shop', 'product', 'item', 'store',
+        'cart', 'add to cart', 'order', 'catalog', 'browse',
+        'recommendation', 'suggest',
+
+        # Chinese keywords
+        '買', '購買', '商品', '產品', '店', '購物', '買東西',
+        '購物車', '加入購物車', '訂單', '目錄', '瀏覽',
+        '推薦', '建議',
+
+        # Product names
+        'iphone', 'macbook', 'airpods', 'apple watch',
+        'phone', 'laptop', 'computer', 'tablet'
+    ]
+}
+
+
+# Pattern sets are as static as the keyword lists: compile each pattern
+# once at import time and run one search per pattern. (A single union
+# regex was tried and reverted: finditer yields non-overlapping matches,
+# so a pattern whose hit lies inside an earlier alternative's span was
+# silently dropped and scores diverged from the per-pattern baseline)
+_PATTERNS: Dict["IntentType", List[str]] = {
+    IntentType.PAYMENT: [
+        r'(?:我要|想要|要).*付款',
+        r'proceed.*payment',
+        r'complete.*purchase',
+        r'verify.*otp',
+        r'\b\d{6}\b',  # OTP pattern
+    ],
+
+    IntentType.SHOPPING: [
+        r'(?:我要|想要|要).*(?:買|購買)',
+        r'(?:搜尋|找|查).*(?:商品|產品)',
+        r'show.*product',
+        r'search.*for',
+        r'add.*cart',
+    ]
+}
+
+_COMPILED_PATTERNS: Dict["IntentType", List["re.Pattern"]] = {
+    intent: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for intent, patterns in _PATTERNS.items()
+}
+
+# Fixed intent ordering so the scoring hot path can run on flat list
+# counters indexed by ordinal instead of allocating dicts per message
+_INTENT_ORDER: tuple = tuple(IntentType)
+_INTENT_INDEX: Dict["IntentType", int] = {
+    intent: index for index, intent in enumerate(_INTENT_ORDER)
+}
+_PAYMENT_INDEX: int = _INTENT_INDEX[IntentType.PAYMENT]
+
+# Value strings aligned with _INTENT_ORDER, so building all_scores zips
+# two flat tuples instead of doing an enum attribute lookup per intent
+_INTENT_VALUES: tuple = tuple(intent.value for intent in _INTENT_ORDER)
+
+
+# Shared fast-path result for bare OTP messages ("123456" is one of the
+# most common LINE messages in this flow). Detection results are already
+# shared via the caches, so one module-level dict is consistent
+_OTP_RESULT: Dict[str, Any] = {
+    "intent": IntentType.PAYMENT,
+    "confidence": 0.95,
+    "matched_keywords": [],
+    "matched_patterns": [r'\b\d{6}\b'],
+    "all_scores": {
+        intent.value: (2.0 if intent is IntentType.PAYMENT else 0.0)
+        for intent in _INTENT_ORDER
+    }
+}
+
+
+def _build_keyword_automaton() -> ahocorasick.Automaton:
+    """Compile all intent keywords into one Aho-Corasick automaton."""
+    word_map: Dict[str, List[tuple]] = {}
+    for intent, keywords in _KEYWORDS.items():
+        for keyword in keywords:
+            word_map.setdefault(keyword.lower(), []).append((intent, keyword))
+
+    automaton = ahocorasick.Automaton()
+    for word, owners in word_map.items():
+        automaton.add_word(word, owners)
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
 class IntentDetector:
     """Enhanced intent detection with pattern matching and confidence scoring."""
-    
+
     def __init__(self):
-        self.keywords = {
-            IntentType.PAYMENT: [
-                # English keywords
-                'pay', 'payment', 'card', 'checkout', 'otp', 'verify',
-                'confirm purchase', 'complete order', 'transaction',
-                'billing', 'invoice', 'receipt',
-                
-                # Chinese keywords
-                '付款', '支付', '付錢', '結帳', '驗證碼', '驗證',
-                '確認購買', '完成訂單', '交易', '帳單', '收據'
-            ],
-            
-            IntentType.SHOPPING: [
-                # English keywords
-                'buy', 'purchase', 'shop', 'product', 'item', 'store',
-                'cart', 'add to cart', 'order', 'catalog', 'browse',
-                'recommendation', 'suggest',
-                
-                # Chinese keywords
-                '買', '購買', '商品', '產品', '店', '購物', '買東西',
-                '購物車', '加入購物車', '訂單', '目錄', '瀏覽',
-                '推薦', '建議',
-                
-                # Product names
-                'iphone', 'macbook', 'airpods', 'apple watch', 
-                'phone', 'laptop', 'computer', 'tablet'
-            ]
-        }
-        
-        # Patterns for more complex matching
-        self.patterns = {
-            IntentType.PAYMENT: [
-                r'(我要|想要|要).*付款',
-                r'proceed.*payment',
-                r'complete.*purchase',
-                r'verify.*otp',
-                r'\b\d{6}\b',  # OTP pattern
-            ],
-            
-            IntentType.SHOPPING: [
-                r'(我要|想要|要).*(買|購買)',
-                r'(搜尋|找|查).*(商品|產品)',
-                r'show.*product',
-                r'search.*for',
-                r'add.*cart',
-            ]
-        }
-    
+        self.keywords = _KEYWORDS
+
+        # Precompiled patterns for more complex matching
+        self.patterns = _COMPILED_PATTERNS
+
+        # Shared module-level automaton: one linear scan of the message
+        # reports every keyword of every intent
+        self._keyword_automaton = _KEYWORD_AUTOMATON
+
+        # Short messages repeat heavily across users ("付款", "otp", "yes"),
+        # so warm repeats become a single dict lookup. Entries are small
+        # (a dict of scalars), so a few thousand slots cost little and
+        # ride out bursty duplicate traffic without evictions
+        self._result_cache: LRUCache = LRUCache(maxsize=4096)
+
+        # Dominant LINE case: the whole message is one keyword. Score each
+        # keyword once up front so those messages resolve with a plain
+        # membership lookup before any scanning, never evicted
+        self._exact_results: Dict[str, Dict[str, Any]] = {}
+        for keywords in self.keywords.values():
+            for keyword in keywords:
+                normalized = keyword.lower()
+                self._exact_results[normalized] = self.detect_intent(normalized)
+
     def detect_intent(self, message: str) -> Dict[str, Any]:
         """
         Detect user intent from message with confidence scoring.
@@ -83,49 +167,96 @@ class IntentDetector:
                 "matched_keywords": [],
                 "matched_patterns": []
             }
-        
-        intent_scores = {intent: 0.0 for intent in IntentType}
-        matched_data = {intent: {"keywords": [], "patterns": []} for intent in IntentType}
-        
-        # Keyword matching
-        for intent, keywords in self.keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in message_lower:
-                    intent_scores[intent] += 1.0
-                    matched_data[intent]["keywords"].append(keyword)
-        
-        # Pattern matching (higher weight)
+
+        # Bare OTP fast path: the service only issues 6-digit codes, so
+        # exactly six digits (and nothing else) is a payment code — other
+        # numeric messages fall through to normal scoring as before
+        if len(message_lower) == 6 and message_lower.isdigit():
+            return _OTP_RESULT
+
+        exact = self._exact_results.get(message_lower)
+        if exact is not None:
+            return exact
+
+        cached = self._result_cache.get(message_lower)
+        if cached is not None:
+            return cached
+
+        # Flat counters indexed by intent ordinal; the per-intent match
+        # lists are only allocated for intents that actually score
+        scores = [0.0] * len(_INTENT_ORDER)
+        keyword_hits = [None] * len(_INTENT_ORDER)
+        pattern_hits = [None] * len(_INTENT_ORDER)
+
+        # Keyword matching (single automaton scan over the message)
+        found_keywords = set()
+        for _, owners in self._keyword_automaton.iter(message_lower):
+            found_keywords.update(owners)
+
+        for intent, keyword in found_keywords:
+            index = _INTENT_INDEX[intent]
+            scores[index] += 1.0
+            hits = keyword_hits[index]
+            if hits is None:
+                hits = keyword_hits[index] = []
+            hits.append(keyword)
+
+        # Pattern matching (higher weight): one precompiled search per
+        # pattern, so overlapping hits from different patterns all score
         for intent, patterns in self.patterns.items():
+            index = _INTENT_INDEX[intent]
             for pattern in patterns:
-                if re.search(pattern, message_lower, re.IGNORECASE):
-                    intent_scores[intent] += 2.0
-                    matched_data[intent]["patterns"].append(pattern)
-        
+                if pattern.search(message_lower):
+                    scores[index] += 2.0
+                    hits = pattern_hits[index]
+                    if hits is None:
+                        hits = pattern_hits[index] = []
+                    hits.append(pattern.pattern)
+
         # Find best match
-        best_intent = max(intent_scores, key=intent_scores.get)
-        best_score = intent_scores[best_intent]
-        
+        best_index = max(range(len(scores)), key=scores.__getitem__)
+        best_score = scores[best_index]
+
         # Calculate confidence (normalize by message length and matches)
         if best_score > 0:
             max_possible_score = len(message_lower.split()) * 2
             confidence = min(best_score / max_possible_score, 1.0)
         else:
             confidence = 0.0
-            best_intent = IntentType.SHOPPING  # Default to shopping
-        
+            best_index = _INTENT_INDEX[IntentType.SHOPPING]  # Default to shopping
+
         # Priority adjustment: payment has highest priority if any match
-        if intent_scores[IntentType.PAYMENT] > 0:
-            best_intent = IntentType.PAYMENT
+        if scores[_PAYMENT_INDEX] > 0:
+            best_index = _PAYMENT_INDEX
             confidence = max(confidence, 0.8)
-        
-        return {
-            "intent": best_intent,
+
+        result = {
+            "intent": _INTENT_ORDER[best_index],
             "confidence": confidence,
-            "matched_keywords": matched_data[best_intent]["keywords"],
-            "matched_patterns": matched_data[best_intent]["patterns"],
-            "all_scores": {intent.value: score for intent, score in intent_scores.items()}
+            "matched_keywords": keyword_hits[best_index] or [],
+            "matched_patterns": pattern_hits[best_index] or [],
+            "all_scores": dict(zip(_INTENT_VALUES, scores))
         }
+        self._result_cache[message_lower] = result
+        return result
     
+    def detect_intent_batch(self, messages: List[str]) -> List[Dict[str, Any]]:
+        """
+        Classify many messages in one call (log replay, batch analytics).
+
+        Reuses the precompiled keyword automaton and pattern set, binding
+        the hot method once so bulk classification avoids repeated
+        attribute lookups per message.
+
+        Args:
+            messages: List of message texts to classify
+
+        Returns:
+            List of detection results, one per message, in input order
+        """
+        detect = self.detect_intent
+        return [detect(message) for message in messages]
+
     def get_intent_explanation(self, detection_result: Dict[str, Any]) -> str:
         """Get human-readable explanation of intent detection."""
         intent = detection_result["intent"]
@@ -1,10 +1,16 @@
 """Logging configuration for LINE Bot AP2."""
 
 import logging
+import queue
 import sys
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
 from datetime import datetime
 
+# One background listener per logger name, so repeated setup calls do not
+# leak listener threads
+_listeners: Dict[str, QueueListener] = {}
+
 
 def setup_logger(
     name: str = "linebot_ap2",
@@ -12,34 +18,49 @@ def setup_logger(
     log_file: Optional[str] = None
 ) -> logging.Logger:
     """Set up structured logging for the application."""
-    
+
     # Create logger
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, level.upper()))
-    
+
     # Clear existing handlers
     logger.handlers.clear()
-    
+
+    # Stop any listener left over from a previous setup of this logger
+    old_listener = _listeners.pop(name, None)
+    if old_listener:
+        old_listener.stop()
+
     # Create formatter
     formatter = logging.Formatter(
         fmt='%(asctime)s | %(name)s | %(levelname)s | %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
-    
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
+    handlers = [console_handler]
+
     # File handler (optional)
     if log_file:
         file_handler = logging.FileHandler(log_file)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
+        handlers.append(file_handler)
+
+    # Hand records to a background listener thread: the caller (often the
+    # event loop) only pays for an enqueue, while formatting and stream
+    # I/O happen off the hot path
+    log_queue: queue.Queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = listener
+
     # Prevent duplicate logs
     logger.propagate = False
-    
+
     return logger
 
 
@@ -52,13 +73,18 @@ def log_agent_interaction(
     processing_time: float
 ):
     """Log agent interaction for monitoring and debugging."""
+    # Bail out before slicing the message/response when INFO is filtered;
+    # %-style args defer interpolation to the handler as well
+    if not logger.isEnabledFor(logging.INFO):
+        return
     logger.info(
-        f"Agent Interaction | "
-        f"User: {user_id} | "
-        f"Intent: {intent} | "
-        f"Message: {message[:100]}{'...' if len(message) > 100 else ''} | "
-        f"Response: {response[:100]}{'...' if len(response) > 100 else ''} | "
-        f"Time: {processing_time:.3f}s"
+        "Agent Interaction | User: %s | Intent: %s | Message: %s | "
+        "Response: %s | Time: %.3fs",
+        user_id,
+        intent,
+        message[:100] + ('...' if len(message) > 100 else ''),
+        response[:100] + ('...' if len(response) > 100 else ''),
+        processing_time
     )
 
 
@@ -71,13 +97,12 @@ def log_payment_event(
     status: str = "unknown"
 ):
     """Log payment-related events for audit trail."""
+    if not logger.isEnabledFor(logging.INFO):
+        return
     logger.info(
-        f"Payment Event | "
-        f"Type: {event_type} | "
-        f"User: {user_id} | "
-        f"Mandate: {mandate_id} | "
-        f"Amount: {amount} | "
-        f"Status: {status}"
+        "Payment Event | Type: %s | User: %s | Mandate: %s | "
+        "Amount: %s | Status: %s",
+        event_type, user_id, mandate_id, amount, status
     )
 
 
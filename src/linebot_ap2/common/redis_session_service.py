@@ -0,0 +1,138 @@
+"""Redis-backed ADK session service for multi-worker deployments."""
+
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse
+)
+
+from .logger import setup_logger
+
+
+class RedisSessionService(BaseSessionService):
+    """Session service that stores ADK sessions in Redis.
+
+    InMemorySessionService pins every user to a single process, so scaling
+    to multiple uvicorn workers or pods loses sessions whenever the load
+    balancer re-routes a user. Keeping sessions in Redis lets any worker
+    serve any user and moves session state out of the Python heap. Keys
+    follow session:{app}:{user}:{session_id} and expire with the session
+    lifetime.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        ttl_seconds: int = 3600,
+        pool_size: int = 200
+    ):
+        # Optional dependency: only deployments opting into Redis pay for it
+        import redis.asyncio as redis
+
+        self._redis = redis.Redis.from_url(
+            redis_url,
+            max_connections=pool_size,
+            decode_responses=True
+        )
+        self.ttl_seconds = ttl_seconds
+        self.logger = setup_logger("redis_session_service")
+
+    @staticmethod
+    def _key(app_name: str, user_id: str, session_id: str) -> str:
+        return f"session:{app_name}:{user_id}:{session_id}"
+
+    async def _save(self, session: Session) -> None:
+        session.last_update_time = time.time()
+        await self._redis.set(
+            self._key(session.app_name, session.user_id, session.id),
+            session.model_dump_json(),
+            ex=self.ttl_seconds
+        )
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        """Create a session and persist it to Redis."""
+        session = Session(
+            id=session_id or str(uuid.uuid4()),
+            app_name=app_name,
+            user_id=user_id,
+            state=state or {},
+            last_update_time=time.time()
+        )
+        await self._save(session)
+
+        self.logger.debug(f"Session created in Redis: {session.id}")
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        """Load a session from Redis, or None if missing/expired."""
+        raw = await self._redis.get(self._key(app_name, user_id, session_id))
+        if raw is None:
+            return None
+
+        session = Session.model_validate_json(raw)
+
+        if config and config.num_recent_events is not None:
+            session.events = (
+                session.events[-config.num_recent_events:]
+                if config.num_recent_events else []
+            )
+        if config and config.after_timestamp is not None:
+            session.events = [
+                event for event in session.events
+                if event.timestamp >= config.after_timestamp
+            ]
+
+        return session
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        """List sessions for a user (or all users) ordered by last update."""
+        pattern = self._key(app_name, user_id or "*", "*")
+        sessions = []
+
+        async for key in self._redis.scan_iter(match=pattern):
+            raw = await self._redis.get(key)
+            if raw:
+                session = Session.model_validate_json(raw)
+                session.events = []
+                session.state = {}
+                sessions.append(session)
+
+        sessions.sort(key=lambda session: session.last_update_time)
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        """Delete a session from Redis."""
+        await self._redis.delete(self._key(app_name, user_id, session_id))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        """Append an event and write the updated session back to Redis."""
+        event = await super().append_event(session, event)
+        await self._save(session)
+        return event
+
+    async def close(self) -> None:
+        """Release the Redis connection pool."""
+        await self._redis.aclose()
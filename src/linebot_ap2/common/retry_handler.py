@@ -1,14 +1,14 @@
 """Retry handler with exponential backoff and circuit breaker pattern."""
 
 import asyncio
+import logging
+import random
 import time
 import functools
 from typing import Any, Callable, Optional, Type, Union, List
 from dataclasses import dataclass
 from enum import Enum
 
-from .logger import setup_logger
-
 
 class CircuitState(Enum):
     """Circuit breaker states."""
@@ -41,42 +41,80 @@ class CircuitBreaker:
         self.failure_count = 0
         self.success_count = 0
         self.last_failure_time = 0
-        self.logger = setup_logger("circuit_breaker")
+        # Plain child logger: setup_logger() mutates global handler state
+        # and starts a listener thread, far too heavy to run per instance
+        # (decorators construct these at import time). Records propagate
+        # to the application logger configured once at startup
+        self.logger = logging.getLogger("linebot_ap2.circuit_breaker")
     
-    async def call(self, func: Callable, *args, **kwargs):
-        """Execute function through circuit breaker."""
-        
+    def _check_state(self):
+        """Raise if the circuit is open; move to HALF_OPEN after timeout."""
         if self.state == CircuitState.OPEN:
-            if time.time() - self.last_failure_time > self.config.timeout_seconds:
+            if time.monotonic() - self.last_failure_time > self.config.timeout_seconds:
                 self.state = CircuitState.HALF_OPEN
                 self.success_count = 0
                 self.logger.info("Circuit breaker moved to HALF_OPEN state")
             else:
                 raise CircuitBreakerError("Circuit breaker is OPEN")
-        
+
+    def _record_success(self):
+        if self.state == CircuitState.HALF_OPEN:
+            self.success_count += 1
+            if self.success_count >= self.config.success_threshold:
+                self.state = CircuitState.CLOSED
+                self.failure_count = 0
+                self.logger.info("Circuit breaker moved to CLOSED state")
+
+    def _record_failure(self):
+        self.failure_count += 1
+
+        # The timestamp only matters for the OPEN-state timeout, so it is
+        # taken when the circuit actually opens rather than per failure.
+        # Monotonic clock: wallclock adjustments must not reopen or hold
+        # the circuit
+        if self.state == CircuitState.HALF_OPEN:
+            self.state = CircuitState.OPEN
+            self.last_failure_time = time.monotonic()
+            self.logger.warning("Circuit breaker moved to OPEN state from HALF_OPEN")
+        elif self.failure_count >= self.config.failure_threshold:
+            self.state = CircuitState.OPEN
+            self.last_failure_time = time.monotonic()
+            self.logger.warning("Circuit breaker moved to OPEN state due to failures")
+
+    async def call(self, func: Callable, *args, is_coro: bool = None, **kwargs):
+        """Execute function through circuit breaker.
+
+        Callers that already know whether ``func`` is a coroutine function
+        (the retry decorator determines this once at decoration time) pass
+        ``is_coro`` to skip the per-call inspect check.
+        """
+
+        self._check_state()
+
+        if is_coro is None:
+            is_coro = asyncio.iscoroutinefunction(func)
+
         try:
-            result = await func(*args, **kwargs) if asyncio.iscoroutinefunction(func) else func(*args, **kwargs)
-            
-            if self.state == CircuitState.HALF_OPEN:
-                self.success_count += 1
-                if self.success_count >= self.config.success_threshold:
-                    self.state = CircuitState.CLOSED
-                    self.failure_count = 0
-                    self.logger.info("Circuit breaker moved to CLOSED state")
-            
+            result = await func(*args, **kwargs) if is_coro else func(*args, **kwargs)
+            self._record_success()
             return result
-            
-        except Exception as e:
-            self.failure_count += 1
-            self.last_failure_time = time.time()
-            
-            if self.state == CircuitState.HALF_OPEN:
-                self.state = CircuitState.OPEN
-                self.logger.warning("Circuit breaker moved to OPEN state from HALF_OPEN")
-            elif self.failure_count >= self.config.failure_threshold:
-                self.state = CircuitState.OPEN
-                self.logger.warning("Circuit breaker moved to OPEN state due to failures")
-            
+
+        except Exception:
+            self._record_failure()
+            raise
+
+    def call_sync(self, func: Callable, *args, **kwargs):
+        """Execute a synchronous function through the circuit breaker."""
+
+        self._check_state()
+
+        try:
+            result = func(*args, **kwargs)
+            self._record_success()
+            return result
+
+        except Exception:
+            self._record_failure()
             raise
 
 
@@ -101,7 +139,10 @@ class RetryHandler:
     def __init__(self, config: RetryConfig = None):
         self.config = config or RetryConfig()
         self.circuit_breaker = CircuitBreaker(self.config)
-        self.logger = setup_logger("retry_handler")
+        self.logger = logging.getLogger("linebot_ap2.retry_handler")
+        # Own generator for backoff jitter: no module lookup per attempt
+        # and no contention on the shared random state
+        self._rng = random.Random()
     
     def retry(
         self,
@@ -109,14 +150,23 @@ class RetryHandler:
         non_retryable_exceptions: Union[Type[Exception], List[Type[Exception]]] = (NonRetryableError,)
     ):
         """Decorator for adding retry logic to functions."""
-        
+
+        # Normalized to tuples once at decoration time: isinstance takes a
+        # tuple of types natively, so the except paths avoid a Python-level
+        # any() loop per caught exception
         if not isinstance(retryable_exceptions, (list, tuple)):
-            retryable_exceptions = [retryable_exceptions]
-        
+            retryable_exceptions = (retryable_exceptions,)
+        retryable_exceptions = tuple(retryable_exceptions)
+
         if not isinstance(non_retryable_exceptions, (list, tuple)):
-            non_retryable_exceptions = [non_retryable_exceptions]
+            non_retryable_exceptions = (non_retryable_exceptions,)
+        non_retryable_exceptions = tuple(non_retryable_exceptions)
         
         def decorator(func: Callable):
+            # Decided once here; the wrappers and the circuit breaker
+            # branch on the stored bool instead of re-inspecting func
+            is_coro = asyncio.iscoroutinefunction(func)
+
             @functools.wraps(func)
             async def async_wrapper(*args, **kwargs):
                 return await self._execute_with_retry(
@@ -125,22 +175,15 @@ class RetryHandler:
             
             @functools.wraps(func)
             def sync_wrapper(*args, **kwargs):
-                if asyncio.iscoroutinefunction(func):
-                    # Run async function in sync context
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        return loop.run_until_complete(async_wrapper(*args, **kwargs))
-                    finally:
-                        loop.close()
-                else:
-                    # Handle sync function
-                    return asyncio.run(self._execute_with_retry(
-                        func, args, kwargs, retryable_exceptions, non_retryable_exceptions
-                    ))
+                # Sync functions retry without an event loop: the backoff
+                # is plain time.sleep, so spinning up asyncio per call
+                # would only add loop setup and teardown overhead
+                return self._execute_with_retry_sync(
+                    func, args, kwargs, retryable_exceptions, non_retryable_exceptions
+                )
             
             # Return appropriate wrapper based on function type
-            return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+            return async_wrapper if is_coro else sync_wrapper
         
         return decorator
     
@@ -149,8 +192,8 @@ class RetryHandler:
         func: Callable,
         args: tuple,
         kwargs: dict,
-        retryable_exceptions: List[Type[Exception]],
-        non_retryable_exceptions: List[Type[Exception]]
+        retryable_exceptions: tuple,
+        non_retryable_exceptions: tuple
     ):
         """Execute function with retry logic."""
         
@@ -158,8 +201,10 @@ class RetryHandler:
         
         for attempt in range(self.config.max_attempts):
             try:
-                # Execute through circuit breaker
-                result = await self.circuit_breaker.call(func, *args, **kwargs)
+                # Execute through circuit breaker; only coroutine functions
+                # reach this async path (the decorator routes sync ones to
+                # _execute_with_retry_sync), so the inspect check is skipped
+                result = await self.circuit_breaker.call(func, *args, is_coro=True, **kwargs)
                 
                 if attempt > 0:
                     self.logger.info(f"Function succeeded on attempt {attempt + 1}")
@@ -174,12 +219,12 @@ class RetryHandler:
                 last_exception = e
                 
                 # Check if exception is non-retryable
-                if any(isinstance(e, exc_type) for exc_type in non_retryable_exceptions):
+                if isinstance(e, non_retryable_exceptions):
                     self.logger.error(f"Non-retryable error: {str(e)}")
                     raise
                 
                 # Check if exception is retryable
-                if not any(isinstance(e, exc_type) for exc_type in retryable_exceptions):
+                if not isinstance(e, retryable_exceptions):
                     self.logger.error(f"Non-retryable error (not in allowed list): {str(e)}")
                     raise
                 
@@ -196,7 +241,60 @@ class RetryHandler:
         
         # All attempts failed
         raise last_exception
-    
+
+    def _execute_with_retry_sync(
+        self,
+        func: Callable,
+        args: tuple,
+        kwargs: dict,
+        retryable_exceptions: tuple,
+        non_retryable_exceptions: tuple
+    ):
+        """Execute a synchronous function with retry logic (no event loop)."""
+
+        last_exception = None
+
+        for attempt in range(self.config.max_attempts):
+            try:
+                # Execute through circuit breaker
+                result = self.circuit_breaker.call_sync(func, *args, **kwargs)
+
+                if attempt > 0:
+                    self.logger.info(f"Function succeeded on attempt {attempt + 1}")
+
+                return result
+
+            except CircuitBreakerError:
+                self.logger.error("Circuit breaker is open, failing fast")
+                raise
+
+            except Exception as e:
+                last_exception = e
+
+                # Check if exception is non-retryable
+                if isinstance(e, non_retryable_exceptions):
+                    self.logger.error(f"Non-retryable error: {str(e)}")
+                    raise
+
+                # Check if exception is retryable
+                if not isinstance(e, retryable_exceptions):
+                    self.logger.error(f"Non-retryable error (not in allowed list): {str(e)}")
+                    raise
+
+                # Log retry attempt
+                if attempt < self.config.max_attempts - 1:
+                    delay = self._calculate_delay(attempt)
+                    self.logger.warning(
+                        f"Attempt {attempt + 1} failed: {str(e)}. "
+                        f"Retrying in {delay:.2f} seconds..."
+                    )
+                    time.sleep(delay)
+                else:
+                    self.logger.error(f"All {self.config.max_attempts} attempts failed")
+
+        # All attempts failed
+        raise last_exception
+
     def _calculate_delay(self, attempt: int) -> float:
         """Calculate delay for exponential backoff with jitter."""
         
@@ -204,10 +302,9 @@ class RetryHandler:
         delay = min(delay, self.config.max_delay)
         
         if self.config.jitter:
-            import random
             # Add random jitter (±25%)
             jitter_range = delay * 0.25
-            delay += random.uniform(-jitter_range, jitter_range)
+            delay += self._rng.uniform(-jitter_range, jitter_range)
         
         return max(delay, 0.1)  # Minimum delay of 100ms
 
@@ -216,7 +313,7 @@ class ErrorHandler:
     """Enhanced error handler for categorizing and handling different error types."""
     
     def __init__(self):
-        self.logger = setup_logger("error_handler")
+        self.logger = logging.getLogger("linebot_ap2.error_handler")
         
         # Error categorization
         self.network_errors = (
@@ -236,18 +333,23 @@ class ErrorHandler:
             TypeError,
             AttributeError
         )
-    
+
+        # Ordered dispatch table: first matching tuple wins, which makes
+        # the category priority explicit and keeps categorization to a
+        # single short loop of C-level isinstance checks
+        self._dispatch = (
+            (self.permanent_errors, "permanent"),
+            ((CircuitBreakerError,), "circuit_breaker"),
+            (self.temporary_errors, "temporary"),
+        )
+
     def categorize_error(self, error: Exception) -> str:
         """Categorize error for appropriate handling."""
-        
-        if isinstance(error, self.permanent_errors):
-            return "permanent"
-        elif isinstance(error, self.temporary_errors):
-            return "temporary"
-        elif isinstance(error, CircuitBreakerError):
-            return "circuit_breaker"
-        else:
-            return "unknown"
+
+        for types, category in self._dispatch:
+            if isinstance(error, types):
+                return category
+        return "unknown"
     
     def create_error_response(
         self, 
@@ -317,6 +419,19 @@ default_retry_handler = RetryHandler()
 default_error_handler = ErrorHandler()
 
 
+# Decorators run at import time, so building a fresh RetryHandler (and
+# circuit breaker) per decorated function multiplies the cost across the
+# codebase. Handlers are cached by configuration instead; callsites with
+# the same settings share one handler and therefore one circuit-breaker
+# state, which is the right behavior when they target the same dependency
+@functools.lru_cache(maxsize=32)
+def _get_handler(max_attempts: int, initial_delay: float) -> RetryHandler:
+    return RetryHandler(RetryConfig(
+        max_attempts=max_attempts,
+        initial_delay=initial_delay
+    ))
+
+
 # Convenience decorators
 def retry_on_failure(
     max_attempts: int = 3,
@@ -324,13 +439,8 @@ def retry_on_failure(
     retryable_exceptions: Union[Type[Exception], List[Type[Exception]]] = (Exception,)
 ):
     """Simple retry decorator with default configuration."""
-    
-    config = RetryConfig(
-        max_attempts=max_attempts,
-        initial_delay=initial_delay
-    )
-    
-    handler = RetryHandler(config)
+
+    handler = _get_handler(max_attempts, initial_delay)
     return handler.retry(retryable_exceptions=retryable_exceptions)
 
 
@@ -0,0 +1,58 @@
+"""Fast serialization helpers for tool responses and service transport."""
+
+import sys
+from typing import Any
+
+import msgpack
+import orjson
+
+
+def json_dumps(data: Any) -> str:
+    """Serialize data to a JSON string using orjson.
+
+    orjson is a C-extension encoder that is several times faster than the
+    stdlib json module and serializes datetime/UUID values natively. Types
+    it does not know (e.g. Enum members) fall back to str(), matching the
+    previous json.dumps(..., default=str) behavior.
+    """
+    return orjson.dumps(data, default=str).decode()
+
+
+def _intern_keys(obj: Any) -> Any:
+    """Rebuild parsed containers with interned dict keys.
+
+    A parser allocates fresh key strings for every document, so repeated
+    lookups of the same field compare character by character. Interning
+    the keys lets lookups with literal keys (which CPython interns)
+    short-circuit on pointer equality — webhook events and tool responses
+    reuse the same small key set across thousands of parses.
+    """
+    if isinstance(obj, dict):
+        return {
+            (sys.intern(key) if type(key) is str else key): _intern_keys(value)
+            for key, value in obj.items()
+        }
+    if isinstance(obj, list):
+        return [_intern_keys(value) for value in obj]
+    return obj
+
+
+def json_loads(data) -> Any:
+    """Parse JSON with orjson, interning dict keys for fast lookups."""
+    return _intern_keys(orjson.loads(data))
+
+
+def pack_payload(data: Any) -> bytes:
+    """Serialize a payload to msgpack bytes for service-to-service transport.
+
+    msgpack is considerably smaller and faster than JSON for the nested
+    catalog/mandate structures exchanged between services. JSON remains the
+    format for LLM-facing tool responses; use this pair only where both
+    sides are our own code (queues, RPC, caching).
+    """
+    return msgpack.packb(data, datetime=True, use_bin_type=True, default=str)
+
+
+def unpack_payload(payload: bytes) -> Any:
+    """Deserialize a msgpack payload produced by pack_payload."""
+    return msgpack.unpackb(payload, timestamp=3, raw=False)
@@ -2,19 +2,26 @@
 
 import asyncio
 import time
-from datetime import datetime, timedelta
-from typing import Dict, Optional, List, Any
-from dataclasses import dataclass
+from heapq import heappush, heappop
+from itertools import islice
+from datetime import datetime
+from typing import Dict, Optional, List, Any, NamedTuple
+from dataclasses import dataclass, field
 
+from cachetools import TTLCache
 from google.adk.sessions import InMemorySessionService, Session
 from .logger import setup_logger
 from .retry_handler import RetryHandler, RetryableError
 from ..models.agent import UserSession, AgentMetrics
 
 
-@dataclass
-class SessionStats:
-    """Session statistics and health metrics."""
+# Upper bound on the recycled-object free lists below; beyond this,
+# retired sessions are simply dropped for the GC
+_POOL_LIMIT = 1024
+
+
+class SessionStats(NamedTuple):
+    """Session statistics and health metrics (immutable snapshot)."""
     total_sessions: int
     active_sessions: int
     expired_sessions: int
@@ -22,6 +29,65 @@ class SessionStats:
     last_cleanup: datetime
 
 
+@dataclass(slots=True)
+class _UserSessionInternal:
+    """In-process session record used on the hot path.
+
+    A plain slots dataclass rather than the pydantic ``UserSession``
+    model: construction skips the validation pipeline and field access
+    skips descriptor dispatch, which matters with thousands of live
+    sessions. ``to_model`` produces the pydantic model for callers that
+    need the serializable form.
+    """
+    user_id: str
+    session_id: str
+    created_at: datetime
+    last_activity: datetime
+    created_at_ts: float
+    last_activity_ts: float
+    message_count: int = 0
+    errors: int = 0
+    current_context: Dict[str, Any] = field(default_factory=dict)
+
+    def reset(self, user_id: str, session_id: str,
+              now: datetime, now_ts: float) -> None:
+        """Reinitialize a recycled instance for a new session."""
+        self.user_id = user_id
+        self.session_id = session_id
+        self.created_at = now
+        self.last_activity = now
+        self.created_at_ts = now_ts
+        self.last_activity_ts = now_ts
+        self.message_count = 0
+        self.errors = 0
+        self.current_context.clear()
+
+    def update_activity(self, now: Optional[datetime] = None) -> None:
+        """Update last activity timestamp (see UserSession.update_activity)."""
+        self.last_activity = now if now is not None else datetime.now()
+        self.last_activity_ts = time.time()
+        self.message_count += 1
+
+    @property
+    def is_active(self) -> bool:
+        """Check if session is recently active (within 30 minutes)."""
+        return time.time() - self.last_activity_ts < UserSession.SESSION_TIMEOUT_SECONDS
+
+    def to_model(self) -> UserSession:
+        """Build the pydantic UserSession for API serialization."""
+        return UserSession(
+            user_id=self.user_id,
+            session_id=self.session_id,
+            created_at=self.created_at,
+            last_activity=self.last_activity,
+            created_at_ts=self.created_at_ts,
+            last_activity_ts=self.last_activity_ts,
+            message_count=self.message_count,
+            errors=self.errors,
+            current_context=self.current_context,
+        )
+
+
 class EnhancedSessionManager:
     """Enhanced session manager with comprehensive monitoring and error handling."""
     
@@ -31,70 +97,134 @@ class EnhancedSessionManager:
         
         # Configuration
         self.session_timeout_minutes = self.config.get("session_timeout_minutes", 30)
+        # Converted once; the expiry tick and the TTL stores all want seconds
+        self._timeout_seconds: float = self.session_timeout_minutes * 60
         self.cleanup_interval_seconds = self.config.get("cleanup_interval_seconds", 300)  # 5 minutes
         self.max_sessions_per_user = self.config.get("max_sessions_per_user", 3)
-        
-        # Core components
-        self.session_service = InMemorySessionService()
+        self.max_active_sessions = self.config.get("max_active_sessions", 10_000)
+        
+        # Core components. A redis_url in the config switches session
+        # storage to Redis so multiple workers can share sessions; the
+        # in-process default stays for single-worker/demo runs
+        redis_url = self.config.get("redis_url")
+        if redis_url:
+            from .redis_session_service import RedisSessionService
+
+            self.session_service = RedisSessionService(
+                redis_url,
+                ttl_seconds=self._timeout_seconds
+            )
+        else:
+            self.session_service = InMemorySessionService()
         self.retry_handler = RetryHandler()
         self.logger = setup_logger("session_manager")
         
-        # Session tracking
-        self.active_sessions: Dict[str, str] = {}  # user_id -> session_id
-        self.user_sessions: Dict[str, UserSession] = {}  # user_id -> UserSession
-        self.session_metadata: Dict[str, Dict[str, Any]] = {}  # session_id -> metadata
+        # Session tracking. active_sessions is a bounded TTL cache: inactive
+        # users age out automatically, so the map cannot grow without limit
+        # even if the periodic cleanup falls behind — an evicted user just
+        # gets a fresh session on their next message
+        self.active_sessions: TTLCache = TTLCache(  # user_id -> session_id
+            maxsize=self.max_active_sessions,
+            ttl=self._timeout_seconds
+        )
+        # One record per user carries counts and timestamps directly;
+        # no parallel metadata dict to keep in sync per message
+        self.user_sessions: Dict[str, _UserSessionInternal] = {}  # user_id -> session record
+
+        # Free list for retired session records: short-lived users churn
+        # through sessions, and recycling skips the construction
+        self._session_pool: List[_UserSessionInternal] = []
+
+        # Expiry index: (last_activity_ts, user_id) min-heap so the
+        # periodic cleanup pops only entries old enough to matter instead
+        # of scanning every session. Entries go stale when a user is
+        # active again; they are discarded lazily on pop by comparing
+        # against the record's current timestamp
+        self._expiry_heap: List[tuple] = []
         
         # Metrics
         self.total_sessions_created = 0
         self.total_sessions_cleaned = 0
         self.last_cleanup_time = datetime.now()
-        
-        # Start background cleanup task
-        self._start_cleanup_task()
-        
-        self.logger.info(f"✓ Enhanced session manager initialized for app: {app_name}")
+
+        # Short-lived memo for get_session_stats: the stats endpoint is
+        # typically polled, and the aggregation walks every session
+        self._stats_cache: Optional[SessionStats] = None
+        self._stats_cache_ts = 0.0
+
+        # Background cleanup is scheduled lazily on the first session
+        # call: __init__ often runs before the event loop exists, and
+        # silently dropping the task there would leave sessions
+        # accumulating with no cleanup at all
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+        self.logger.info("✓ Enhanced session manager initialized for app: %s", app_name)
 
 
 class SessionManager(EnhancedSessionManager):
     """Backward compatible session manager."""
-    
-    def __init__(self, app_name: str):
-        super().__init__(app_name)
+
+    def __init__(self, app_name: str, config: Dict[str, Any] = None):
+        super().__init__(app_name, config)
     
     async def get_or_create_session(self, user_id: str) -> str:
         """Get existing session or create new one with enhanced error handling."""
         
+        if self._cleanup_task is None:
+            self._ensure_cleanup_task()
+
         try:
-            # Check if user has existing session
-            if user_id in self.active_sessions:
-                session_id = self.active_sessions[user_id]
-                
-                # Verify session is still valid
-                if await self._is_session_valid(session_id, user_id):
-                    self._update_user_session(user_id, session_id)
-                    self.logger.debug(f"Using existing session: {session_id} for user: {user_id}")
+            # One probe per map on the hot path: .get() instead of a
+            # membership check followed by re-indexing the same key
+            session_id = self.active_sessions.get(user_id)
+            if session_id is not None:
+                user_session = self.user_sessions.get(user_id)
+
+                if user_session is not None and user_session.is_active:
+                    user_session.update_activity()
+                    # Re-set the TTL entry so its clock restarts from this
+                    # activity; otherwise the cache would hard-evict the
+                    # session a fixed ttl after *creation* even for a user
+                    # who never stopped chatting
+                    self.active_sessions[user_id] = session_id
+                    heappush(self._expiry_heap, (user_session.last_activity_ts, user_id))
+                    self.logger.debug("Using existing session: %s for user: %s", session_id, user_id)
                     return session_id
-                else:
-                    # Clean up invalid session
-                    await self._cleanup_invalid_session(user_id, session_id)
-            
+
+                # Clean up invalid session; its slot is free, so skip the
+                # limit check on the replacement
+                await self._cleanup_invalid_session(user_id, session_id)
+                return await self._force_new_session(user_id)
+
             # Create new session
             return await self._create_new_session(user_id)
             
         except Exception as e:
-            self.logger.error(f"Session management error for user {user_id}: {str(e)}")
+            self.logger.error("Session management error for user %s: %s", user_id, e)
             raise RetryableError(f"Session creation failed: {str(e)}")
     
     async def _create_new_session(self, user_id: str) -> str:
         """Create a new session with comprehensive tracking."""
-        
+
         # Check session limits
         if await self._check_session_limits(user_id):
             await self._cleanup_old_sessions(user_id)
-        
-        # Generate unique session ID
-        timestamp = int(time.time())
-        session_id = f"session_{user_id}_{timestamp}"
+
+        return await self._force_new_session(user_id)
+
+    async def _force_new_session(self, user_id: str) -> str:
+        """Create a session without the limit check.
+
+        For callers that just removed the user's previous session
+        (error recovery, invalid-session replacement): the slot is known
+        to be free, so re-running the limit check would be wasted work.
+        """
+
+        # Generate unique session ID. Nanosecond monotonic time in hex:
+        # the old second-resolution timestamp collided when a user got a
+        # new session within the same second (error recovery, bursts),
+        # which made the ADK create_session call fail and forced a retry
+        session_id = f"s_{user_id}_{time.monotonic_ns():x}"
         
         try:
             # Create session in ADK
@@ -107,174 +237,178 @@ class SessionManager(EnhancedSessionManager):
             # Track session
             self.active_sessions[user_id] = session_id
             self._create_user_session(user_id, session_id)
-            self._add_session_metadata(session_id, user_id)
-            
+
             self.total_sessions_created += 1
             
-            self.logger.info(f"✓ New session created: {session_id} for user: {user_id}")
+            self.logger.info("✓ New session created: %s for user: %s", session_id, user_id)
             return session_id
             
         except Exception as e:
-            self.logger.error(f"Failed to create session for user {user_id}: {str(e)}")
+            self.logger.error("Failed to create session for user %s: %s", user_id, e)
             raise
     
-    async def _is_session_valid(self, session_id: str, user_id: str) -> bool:
-        """Check if session is still valid."""
-        
-        # Check if user session exists and is active
-        if user_id in self.user_sessions:
-            user_session = self.user_sessions[user_id]
-            if user_session.is_active:
-                return True
-        
-        return False
-    
     def _create_user_session(self, user_id: str, session_id: str):
         """Create user session tracking object."""
-        
-        user_session = UserSession(
-            user_id=user_id,
-            session_id=session_id,
-            created_at=datetime.now(),
-            last_activity=datetime.now()
-        )
-        
+
+        now = datetime.now()
+        now_ts = time.time()
+        if self._session_pool:
+            user_session = self._session_pool.pop()
+            user_session.reset(user_id, session_id, now, now_ts)
+        else:
+            user_session = _UserSessionInternal(
+                user_id=user_id,
+                session_id=session_id,
+                created_at=now,
+                last_activity=now,
+                created_at_ts=now_ts,
+                last_activity_ts=now_ts
+            )
+
         self.user_sessions[user_id] = user_session
+        heappush(self._expiry_heap, (now_ts, user_id))
     
-    def _update_user_session(self, user_id: str, session_id: str):
-        """Update user session activity."""
-        
-        if user_id in self.user_sessions:
-            self.user_sessions[user_id].update_activity()
-    
-    def _add_session_metadata(self, session_id: str, user_id: str):
-        """Add session metadata for tracking."""
-        
-        self.session_metadata[session_id] = {
-            "user_id": user_id,
-            "created_at": datetime.now(),
-            "last_activity": datetime.now(),
-            "message_count": 0,
-            "errors": 0
-        }
+    def _recycle(self, user_session: Optional[_UserSessionInternal]):
+        """Return a retired session record to the bounded free list."""
+
+        if user_session is not None and len(self._session_pool) < _POOL_LIMIT:
+            self._session_pool.append(user_session)
     
     async def _check_session_limits(self, user_id: str) -> bool:
         """Check if user has too many sessions."""
-        
-        user_session_count = sum(
-            1 for uid, session in self.user_sessions.items()
-            if uid == user_id and session.is_active
-        )
-        
-        return user_session_count >= self.max_sessions_per_user
-    
+
+        # user_sessions is keyed by user_id, so a user holds at most one
+        # tracked session: a direct lookup replaces the full-map scan this
+        # used to run on every session creation
+        session = self.user_sessions.get(user_id)
+        active_count = 1 if session is not None and session.is_active else 0
+        return active_count >= self.max_sessions_per_user
+
     async def _cleanup_old_sessions(self, user_id: str):
-        """Clean up oldest sessions for user."""
-        
-        user_sessions = [
-            (uid, session) for uid, session in self.user_sessions.items()
-            if uid == user_id and session.is_active
-        ]
-        
-        # Sort by creation time and remove oldest
-        user_sessions.sort(key=lambda x: x[1].created_at)
-        
-        for uid, session in user_sessions[:-self.max_sessions_per_user + 1]:
-            await self.cleanup_session(uid)
+        """Clean up the user's existing session before creating a new one."""
+
+        # At most one session per user exists (see _check_session_limits),
+        # so there is nothing to sort — drop the one that is there
+        session = self.user_sessions.get(user_id)
+        if session is not None and session.is_active:
+            self._cleanup_session_sync(user_id)
     
     async def _cleanup_invalid_session(self, user_id: str, session_id: str):
         """Clean up invalid session."""
         
         self.active_sessions.pop(user_id, None)
-        self.user_sessions.pop(user_id, None)
-        self.session_metadata.pop(session_id, None)
-        
-        self.logger.warning(f"Cleaned up invalid session: {session_id} for user: {user_id}")
+        self._recycle(self.user_sessions.pop(user_id, None))
+
+        self.logger.warning("Cleaned up invalid session: %s for user: %s", session_id, user_id)
     
+    def _cleanup_session_sync(self, user_id: str) -> bool:
+        """Clean up session tracking for a user.
+
+        Pure dict work — kept synchronous so bulk callers (the expiry
+        loop, _cleanup_old_sessions) don't yield to the event loop once
+        per user.
+        """
+
+        # The TTL cache evicts on its own clock (ttl == session timeout),
+        # so by the time the expiry heap reaches a user the cache entry is
+        # usually already gone — its absence must not skip removal of the
+        # tracking record, or user_sessions grows without bound
+        session_id = self.active_sessions.pop(user_id, None)
+        user_session = self.user_sessions.pop(user_id, None)
+
+        if session_id is None and user_session is None:
+            return False
+
+        if session_id is None:
+            session_id = user_session.session_id
+
+        self._recycle(user_session)
+        self.total_sessions_cleaned += 1
+
+        self.logger.info("✓ Session cleaned up: %s for user: %s", session_id, user_id)
+        return True
+
     async def cleanup_session(self, user_id: str) -> bool:
         """Clean up session for user with enhanced tracking."""
-        
-        if user_id not in self.active_sessions:
-            return False
-        
-        session_id = self.active_sessions[user_id]
-        
-        try:
-            # Clean up tracking data
-            self.active_sessions.pop(user_id, None)
-            self.user_sessions.pop(user_id, None)
-            self.session_metadata.pop(session_id, None)
-            
-            self.total_sessions_cleaned += 1
-            
-            self.logger.info(f"✓ Session cleaned up: {session_id} for user: {user_id}")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Failed to cleanup session for user {user_id}: {str(e)}")
-            return False
-    
+
+        return self._cleanup_session_sync(user_id)
+
     async def handle_session_error(self, user_id: str) -> str:
         """Handle session errors with enhanced recovery."""
         
-        self.logger.warning(f"Handling session error for user: {user_id}")
+        self.logger.warning("Handling session error for user: %s", user_id)
         
         # Track error
-        if user_id in self.user_sessions:
-            session_id = self.user_sessions[user_id].session_id
-            if session_id in self.session_metadata:
-                self.session_metadata[session_id]["errors"] += 1
+        user_session = self.user_sessions.get(user_id)
+        if user_session is not None:
+            user_session.errors += 1
         
         # Clean up invalid session
         await self.cleanup_session(user_id)
-        
-        # Create new session
-        return await self.get_or_create_session(user_id)
+
+        # Create new session directly: re-entering get_or_create_session
+        # would redo the existing-session lookup and the limit check for
+        # a user we just cleaned up
+        try:
+            return await self._force_new_session(user_id)
+        except Exception as e:
+            self.logger.error("Session management error for user %s: %s", user_id, e)
+            raise RetryableError(f"Session creation failed: {str(e)}")
     
     def record_message(self, user_id: str):
         """Record message activity for user."""
-        
-        if user_id in self.user_sessions:
-            self.user_sessions[user_id].update_activity()
-            
-            session_id = self.user_sessions[user_id].session_id
-            if session_id in self.session_metadata:
-                self.session_metadata[session_id]["message_count"] += 1
-                self.session_metadata[session_id]["last_activity"] = datetime.now()
+
+        user_session = self.user_sessions.get(user_id)
+        if user_session is not None:
+            user_session.update_activity()
+            heappush(self._expiry_heap, (user_session.last_activity_ts, user_id))
     
     def get_active_session_count(self) -> int:
-        """Get count of active sessions."""
+        """Get count of active sessions (O(1), no scan)."""
         return len(self.active_sessions)
-    
-    def list_active_users(self) -> List[str]:
-        """Get list of users with active sessions."""
-        return list(self.active_sessions.keys())
+
+    def list_active_users(self, limit: int = 100) -> List[str]:
+        """Get a bounded sample of users with active sessions.
+
+        Capped so metrics endpoints stay O(limit) instead of copying the
+        whole session map while it is large.
+        """
+        return list(islice(self.active_sessions.keys(), limit))
     
     def get_session_stats(self) -> SessionStats:
-        """Get comprehensive session statistics."""
-        
+        """Get comprehensive session statistics (memoized for one second)."""
+
+        now_ts = time.time()
+        if self._stats_cache is not None and now_ts - self._stats_cache_ts < 1.0:
+            return self._stats_cache
+
         active_sessions = len(self.active_sessions)
-        
-        # Calculate average session duration
-        total_duration = 0
+
+        # One pass of pure float arithmetic: activity is compared against
+        # a precomputed cutoff instead of calling is_active (and thus the
+        # clock) once per session
+        total_duration = 0.0
         session_count = 0
-        
+        cutoff = now_ts - UserSession.SESSION_TIMEOUT_SECONDS
+
         for user_session in self.user_sessions.values():
-            if user_session.is_active:
-                duration = (datetime.now() - user_session.created_at).total_seconds()
-                total_duration += duration
+            if user_session.last_activity_ts > cutoff:
+                total_duration += now_ts - user_session.created_at_ts
                 session_count += 1
-        
+
         avg_duration = total_duration / session_count if session_count > 0 else 0
-        
-        return SessionStats(
+
+        stats = SessionStats(
             total_sessions=self.total_sessions_created,
             active_sessions=active_sessions,
             expired_sessions=self.total_sessions_cleaned,
             average_session_duration=avg_duration,
             last_cleanup=self.last_cleanup_time
         )
-    
+        self._stats_cache = stats
+        self._stats_cache_ts = now_ts
+        return stats
+
     def get_user_session_info(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed session information for user."""
         
@@ -282,52 +416,56 @@ class SessionManager(EnhancedSessionManager):
             return None
         
         user_session = self.user_sessions[user_id]
-        session_id = user_session.session_id
-        metadata = self.session_metadata.get(session_id, {})
-        
+
         return {
             "user_id": user_id,
-            "session_id": session_id,
+            "session_id": user_session.session_id,
             "created_at": user_session.created_at.isoformat(),
             "last_activity": user_session.last_activity.isoformat(),
             "message_count": user_session.message_count,
-            "is_active": user_session.is_active,
-            "session_metadata": metadata
+            "errors": user_session.errors,
+            "is_active": user_session.is_active
         }
     
-    def _start_cleanup_task(self):
-        """Start background cleanup task."""
-        
-        async def cleanup_expired_sessions():
-            while True:
-                try:
-                    await asyncio.sleep(self.cleanup_interval_seconds)
-                    await self._cleanup_expired_sessions()
-                except Exception as e:
-                    self.logger.error(f"Background cleanup error: {str(e)}")
-        
-        # Start task in background (non-blocking)
-        try:
-            asyncio.create_task(cleanup_expired_sessions())
-        except RuntimeError:
-            # No event loop running, skip background task
-            pass
+    def _ensure_cleanup_task(self):
+        """Schedule the background cleanup loop on the running loop.
+
+        Called from async context, so get_running_loop raises loudly if
+        something is wrong instead of silently leaving cleanup unscheduled.
+        """
+
+        loop = asyncio.get_running_loop()
+        self._cleanup_task = loop.create_task(self._cleanup_loop())
+
+    async def _cleanup_loop(self):
+        """Periodically clean up expired sessions."""
+
+        while True:
+            try:
+                await asyncio.sleep(self.cleanup_interval_seconds)
+                await self._cleanup_expired_sessions()
+            except Exception as e:
+                self.logger.error("Background cleanup error: %s", e)
     
     async def _cleanup_expired_sessions(self):
         """Clean up expired sessions."""
         
-        cutoff_time = datetime.now() - timedelta(minutes=self.session_timeout_minutes)
-        expired_users = []
-        
-        for user_id, user_session in self.user_sessions.items():
-            if user_session.last_activity < cutoff_time:
-                expired_users.append(user_id)
-        
-        # Clean up expired sessions
-        for user_id in expired_users:
-            await self.cleanup_session(user_id)
-        
-        if expired_users:
-            self.logger.info(f"Cleaned up {len(expired_users)} expired sessions")
+        # Pop the expiry heap instead of scanning every session: only
+        # entries older than the cutoff are touched. A popped entry whose
+        # timestamp no longer matches the record is stale (the user was
+        # active since) and is simply discarded
+        cutoff = time.time() - self._timeout_seconds
+        heap = self._expiry_heap
+        expired_count = 0
+
+        while heap and heap[0][0] < cutoff:
+            entry_ts, user_id = heappop(heap)
+            user_session = self.user_sessions.get(user_id)
+            if user_session is not None and user_session.last_activity_ts == entry_ts:
+                if self._cleanup_session_sync(user_id):
+                    expired_count += 1
+
+        if expired_count:
+            self.logger.info("Cleaned up %d expired sessions", expired_count)
         
         self.last_cleanup_time = datetime.now()
\ No newline at end of file
@@ -2,6 +2,7 @@
 
 import os
 import sys
+from functools import lru_cache
 from typing import Optional
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
@@ -31,7 +32,12 @@ class Settings(BaseSettings):
     
     # Agent Configuration
     default_model: str = "gemini-2.5-flash"
+    agent_timeout_seconds: int = 60
     session_timeout_minutes: int = 30
+
+    # Optional scale-out backends (both off by default)
+    redis_url: Optional[str] = Field(default=None, alias="REDIS_URL")
+    celery_broker_url: Optional[str] = Field(default=None, alias="CELERY_BROKER_URL")
     max_otp_attempts: int = 3
     otp_expiry_minutes: int = 5
     
@@ -81,8 +87,14 @@ class Settings(BaseSettings):
         return v
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings instance."""
+    """Get application settings instance.
+
+    Cached: constructing Settings re-reads the environment and runs every
+    field validator, so repeat callers share one validated instance.
+    Tests that change the environment can call get_settings.cache_clear().
+    """
     try:
         return Settings()
     except Exception as e:
@@ -24,7 +24,7 @@ from .payment import (
     PaymentToken,
 )
 from .product import Product, ProductCategory, ShoppingCart
-from .agent import AgentResponse, IntentResult
+from .agent import AgentResponse, IntentResult, new_agent_response, new_intent_result
 
 __all__ = [
     # Payment enums
@@ -61,4 +61,6 @@ __all__ = [
     # Agent
     "AgentResponse",
     "IntentResult",
+    "new_agent_response",
+    "new_intent_result",
 ]
@@ -1,7 +1,8 @@
 """Agent-related data models."""
 
+import time
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, ClassVar
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -64,6 +65,54 @@ class IntentResult(BaseModel):
         return len(self.matched_keywords) > 0 or len(self.matched_patterns) > 0
 
 
+def new_agent_response(
+    agent_type: AgentType,
+    user_id: str,
+    session_id: str,
+    message: str,
+    response: str = "",
+) -> AgentResponse:
+    """Build an AgentResponse for internally-produced, known-good data.
+
+    model_construct skips the validation pipeline, which is safe here
+    because every field comes straight from our own dispatch path.
+    """
+    return AgentResponse.model_construct(
+        agent_type=agent_type,
+        user_id=user_id,
+        session_id=session_id,
+        message=message,
+        response=response,
+        status=ResponseStatus.SUCCESS,
+        processing_time=0.0,
+        timestamp=datetime.now(),
+        metadata={},
+        error_message=None,
+    )
+
+
+def new_intent_result(
+    intent: str,
+    confidence: float,
+    matched_keywords: Optional[List[str]] = None,
+    matched_patterns: Optional[List[str]] = None,
+    all_scores: Optional[Dict[str, float]] = None,
+) -> IntentResult:
+    """Build an IntentResult from a detector result without re-validating.
+
+    The intent detector already produces values in range, so the
+    validation pass on every message would only repeat its work.
+    """
+    return IntentResult.model_construct(
+        intent=intent,
+        confidence=confidence,
+        matched_keywords=matched_keywords if matched_keywords is not None else [],
+        matched_patterns=matched_patterns if matched_patterns is not None else [],
+        all_scores=all_scores if all_scores is not None else {},
+        timestamp=datetime.now(),
+    )
+
+
 class AgentMetrics(BaseModel):
     """Agent performance metrics."""
     agent_type: AgentType
@@ -88,21 +137,27 @@ class AgentMetrics(BaseModel):
             return 0.0
         return self.error_responses / self.total_requests
     
+    _STATUS_COUNTERS: ClassVar[Dict[ResponseStatus, str]] = {
+        ResponseStatus.SUCCESS: "successful_responses",
+        ResponseStatus.ERROR: "error_responses",
+        ResponseStatus.ESCALATED: "escalated_responses",
+    }
+
     def update_metrics(self, response: AgentResponse) -> None:
         """Update metrics with new response."""
         self.total_requests += 1
         self.last_activity = response.timestamp
-        
-        if response.status == ResponseStatus.SUCCESS:
-            self.successful_responses += 1
-        elif response.status == ResponseStatus.ERROR:
-            self.error_responses += 1
-        elif response.status == ResponseStatus.ESCALATED:
-            self.escalated_responses += 1
-        
-        # Update average processing time
-        total_time = self.average_processing_time * (self.total_requests - 1)
-        self.average_processing_time = (total_time + response.processing_time) / self.total_requests
+
+        counter = self._STATUS_COUNTERS.get(response.status)
+        if counter is not None:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+        # Incremental mean (Welford): avoids reconstructing the running
+        # total each update and drifts less over long uptimes
+        self.average_processing_time += (
+            (response.processing_time - self.average_processing_time)
+            / self.total_requests
+        )
 
 
 class UserSession(BaseModel):
@@ -111,16 +166,28 @@ class UserSession(BaseModel):
     session_id: str
     created_at: datetime = Field(default_factory=datetime.now)
     last_activity: datetime = Field(default_factory=datetime.now)
+    # Epoch floats mirror the datetime fields for activity checks: expiry
+    # scans compare two floats instead of building timedelta objects per
+    # session. The datetime fields remain the serialized representation
+    created_at_ts: float = Field(default_factory=time.time)
+    last_activity_ts: float = Field(default_factory=time.time)
     message_count: int = 0
+    errors: int = 0
     current_context: Dict[str, Any] = Field(default_factory=dict)
-    
-    def update_activity(self) -> None:
-        """Update last activity timestamp."""
-        self.last_activity = datetime.now()
+
+    SESSION_TIMEOUT_SECONDS: ClassVar[float] = 30 * 60
+
+    def update_activity(self, now: Optional[datetime] = None) -> None:
+        """Update last activity timestamp.
+
+        Callers that already hold a timestamp for the current operation
+        pass it in so one clock read covers the whole update.
+        """
+        self.last_activity = now if now is not None else datetime.now()
+        self.last_activity_ts = time.time()
         self.message_count += 1
-    
+
     @property
     def is_active(self) -> bool:
         """Check if session is recently active (within 30 minutes)."""
-        from datetime import timedelta
-        return datetime.now() - self.last_activity < timedelta(minutes=30)
\ No newline at end of file
+        return time.time() - self.last_activity_ts < self.SESSION_TIMEOUT_SECONDS
\ No newline at end of file
@@ -1,5 +1,6 @@
 """Payment-related data models."""
 
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
@@ -353,12 +354,17 @@ class OTPData(BaseModel):
     mandate_id: str
     payment_method_id: str
     expires_at: datetime
+    # Monotonic-clock deadline; cheaper to check than a datetime compare
+    # and immune to wall-clock adjustments
+    monotonic_deadline: Optional[float] = None
     attempts: int = 0
     max_attempts: int = 3
     created_at: datetime = Field(default_factory=datetime.now)
-    
+
     def is_expired(self) -> bool:
         """Check if OTP is expired."""
+        if self.monotonic_deadline is not None:
+            return time.monotonic() > self.monotonic_deadline
         return datetime.now() > self.expires_at
     
     def is_blocked(self) -> bool:
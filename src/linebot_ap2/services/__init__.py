@@ -4,6 +4,8 @@ This module provides shared singleton instances of services to ensure
 data consistency across different agents and tools.
 """
 
+from functools import lru_cache
+
 from .mandate_service import MandateService
 from .payment_service import PaymentService
 from .product_service import ProductService
@@ -21,21 +23,27 @@ _shared_credential_provider = CredentialProviderService()
 _shared_payment_service.set_mandate_service(_shared_mandate_service)
 
 
+# lru_cache turns repeat accessor calls into a C-level cache hit instead
+# of a Python frame push + global load — tools call these on every request
+@lru_cache(maxsize=1)
 def get_product_service() -> ProductService:
     """Get shared ProductService singleton instance."""
     return _shared_product_service
 
 
+@lru_cache(maxsize=1)
 def get_mandate_service() -> MandateService:
     """Get shared MandateService singleton instance."""
     return _shared_mandate_service
 
 
+@lru_cache(maxsize=1)
 def get_payment_service() -> PaymentService:
     """Get shared PaymentService singleton instance."""
     return _shared_payment_service
 
 
+@lru_cache(maxsize=1)
 def get_credential_provider() -> CredentialProviderService:
     """Get shared CredentialProviderService singleton instance."""
     return _shared_credential_provider
@@ -1,7 +1,6 @@
 """AP2 Credential Provider Service - Manages user payment credentials."""
 
 import json
-import uuid
 import secrets
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
@@ -116,7 +115,7 @@ class CredentialProviderService:
         Returns:
             Created PaymentCredential
         """
-        credential_id = f"cred_{uuid.uuid4().hex[:12]}"
+        credential_id = f"cred_{secrets.token_hex(6)}"
 
         # Extract last four digits for display
         if credential_type == PaymentMethodType.CARD:
@@ -306,7 +305,7 @@ class CredentialProviderService:
             return None
 
         # Generate secure token
-        token_id = f"tok_{uuid.uuid4().hex[:12]}"
+        token_id = f"tok_{secrets.token_hex(6)}"
         token_value = secrets.token_urlsafe(32)
 
         token = PaymentToken(
@@ -1,7 +1,7 @@
 """AP2 Mandate Service - Handles secure mandate creation and signing."""
 
 import json
-import uuid
+import secrets
 import hashlib
 import hmac
 from datetime import datetime, timedelta, timezone
@@ -47,7 +47,7 @@ class MandateService:
     ) -> CartMandate:
         """Create a new cart mandate with AP2 compliance."""
 
-        mandate_id = f"mandate_{uuid.uuid4().hex[:12]}"
+        mandate_id = f"mandate_{secrets.token_hex(6)}"
 
         # Convert items to CartItem objects
         cart_items = []
@@ -100,7 +100,7 @@ class MandateService:
         self.logger.info(f"Signing mandate: {mandate.mandate_id}")
 
         # Create signature payload
-        nonce = uuid.uuid4().hex[:16]
+        nonce = secrets.token_hex(8)
         timestamp = datetime.now().isoformat()
         
         payload = {
@@ -159,7 +159,7 @@ class MandateService:
         )
 
         # Create merchant signature payload
-        nonce = uuid.uuid4().hex[:16]
+        nonce = secrets.token_hex(8)
         timestamp = datetime.now()
 
         payload = {
@@ -219,7 +219,7 @@ class MandateService:
         )
 
         # Create user signature payload
-        nonce = uuid.uuid4().hex[:16]
+        nonce = secrets.token_hex(8)
         timestamp = datetime.now()
 
         payload = {
@@ -265,7 +265,7 @@ class MandateService:
         """
         self.logger.info(f"Creating PaymentMandate for cart: {cart_mandate.mandate_id}")
 
-        payment_mandate_id = f"pm_{uuid.uuid4().hex[:12]}"
+        payment_mandate_id = f"pm_{secrets.token_hex(6)}"
 
         # Create payment mandate contents
         contents = PaymentMandateContents(
@@ -335,6 +335,19 @@ class MandateService:
     def get_mandate(self, mandate_id: str) -> Optional[CartMandate]:
         """Get mandate by ID."""
         return self.active_mandates.get(mandate_id)
+
+    def enter_scope(self) -> None:
+        """Start a fresh mandate store for an isolated run (demos, tests).
+
+        Rebinding replaces the table in O(1) instead of clear()+refill,
+        which churns the shared dict's hash table and mutates state under
+        anything still holding a reference to it.
+        """
+        self.active_mandates = {}
+
+    def exit_scope(self) -> None:
+        """Drop the current scope's mandates (scopes do not nest)."""
+        self.enter_scope()
     
     def update_mandate_status(
         self, 
@@ -367,8 +380,8 @@ class MandateService:
             f"status={mandate.status.value}"
         )
 
-        # Check expiration
-        if mandate.is_expired():
+        # Check expiration (reuse the timestamp captured above)
+        if mandate.expires_at and now > mandate.expires_at:
             time_diff = (now - mandate.expires_at).total_seconds() if mandate.expires_at else 0
             self.logger.warning(
                 f"❌ Mandate {mandate_id} is EXPIRED! "
@@ -1,12 +1,19 @@
 """Enhanced Payment Service with AP2 compliance and security features."""
 
+import hmac
 import json
-import uuid
 import random
+import secrets
+import threading
+import time
+import zlib
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 from enum import Enum
 
+from cachetools import TTLCache
+
 from ..models.payment import (
     PaymentMethod, OTPData, Transaction, PaymentStatus, RefundRequest,
     TransactionModality
@@ -14,6 +21,27 @@ from ..models.payment import (
 from ..common.logger import setup_logger
 
 
+# 64-way striping hashed by mandate_id: verifications on different
+# mandates never contend, while the read-modify-write on a single OTP
+# record (attempts increment, delete-on-success) stays atomic. Each
+# stripe owns its own TTL sub-store as well as its lock — TTLCache is
+# not thread-safe (every access rebalances its expiry links), so two
+# stripes must never mutate a shared cache instance
+_STRIPE_BITS = 6
+_STRIPE_COUNT = 1 << _STRIPE_BITS
+_LOCKS = tuple(threading.RLock() for _ in range(_STRIPE_COUNT))
+
+
+def _stripe_for(mandate_id: str) -> int:
+    """Return the stripe index for the given mandate."""
+    return hash(mandate_id) & (_STRIPE_COUNT - 1)
+
+
+def _lock_for(mandate_id: str) -> threading.RLock:
+    """Return the stripe lock guarding the given mandate's OTP record."""
+    return _LOCKS[_stripe_for(mandate_id)]
+
+
 class PaymentError(Exception):
     """Payment-related errors."""
     pass
@@ -38,9 +66,23 @@ class PaymentService:
         
         # Storage (in production, use secure persistent storage)
         self.payment_methods: Dict[str, List[PaymentMethod]] = {}
-        self.otp_store: Dict[str, OTPData] = {}
+        # Secondary index: user_id -> {method_id -> PaymentMethod} for O(1) lookups
+        self._methods_by_id: Dict[str, Dict[str, PaymentMethod]] = {}
+        # Pre-serialized method dicts, rebuilt only when a user's methods
+        # change — responses splice these in instead of re-serializing
+        self._method_dicts: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Bounded TTL stores, one per lock stripe: abandoned OTPs are
+        # evicted automatically instead of leaking until a verify call
+        # happens to hit them, and each sub-store is only ever touched
+        # under its own stripe's lock
+        self._otp_stores: tuple = self._new_otp_stores()
         self.transactions: Dict[str, Transaction] = {}
         self.refunds: Dict[str, RefundRequest] = {}
+
+        # Audit events are queued here instead of being persisted inline;
+        # a background writer can drain them in batches so durability
+        # writes stay off the OTP hot path
+        self._audit_events: deque = deque(maxlen=10_000)
         
         # Demo payment methods
         self._init_demo_payment_methods()
@@ -54,6 +96,24 @@ class PaymentService:
         """Set mandate service reference for PaymentMandate creation."""
         self._mandate_service = mandate_service
 
+    def _new_otp_stores(self) -> tuple:
+        """Build one TTL sub-store per lock stripe (same total bound)."""
+        return tuple(
+            TTLCache(
+                maxsize=max(100_000 // _STRIPE_COUNT, 1),
+                ttl=self.otp_expiry_minutes * 60
+            )
+            for _ in range(_STRIPE_COUNT)
+        )
+
+    def _otp_store_for(self, mandate_id: str) -> TTLCache:
+        """Return the sub-store holding the given mandate's OTP record.
+
+        Guarded by the matching stripe lock from _lock_for; callers must
+        hold that lock around any access.
+        """
+        return self._otp_stores[_stripe_for(mandate_id)]
+
     def _init_demo_payment_methods(self):
         """Initialize demo payment methods."""
         demo_methods = [
@@ -89,7 +149,17 @@ class PaymentService:
         
         # Assign to demo users
         for user_id in ["demo_user", "test_user"]:
-            self.payment_methods[user_id] = demo_methods.copy()
+            self._set_user_payment_methods(user_id, demo_methods.copy())
+
+    def _set_user_payment_methods(self, user_id: str, methods: List[PaymentMethod]) -> None:
+        """Store payment methods for user and keep the id index in sync."""
+        self.payment_methods[user_id] = methods
+        self._methods_by_id[user_id] = {method.id: method for method in methods}
+        self._method_dicts[user_id] = {method.id: method.dict() for method in methods}
+
+    def _get_payment_method(self, user_id: str, payment_method_id: str) -> Optional[PaymentMethod]:
+        """Look up a payment method by id via the index."""
+        return self._methods_by_id.get(user_id, {}).get(payment_method_id)
     
     def get_user_payment_methods(self, user_id: str) -> Dict[str, Any]:
         """Get available payment methods for user."""
@@ -98,15 +168,17 @@ class PaymentService:
 
         if not methods:
             # Create default payment methods for new users
-            self.payment_methods[user_id] = self._create_default_payment_methods()
+            self._set_user_payment_methods(user_id, self._create_default_payment_methods())
             methods = self.payment_methods[user_id]
 
+        method_dicts = self._method_dicts[user_id]
+
         return {
             "user_id": user_id,
-            "payment_methods": [method.dict() for method in methods],
+            "payment_methods": [method_dicts[method.id] for method in methods],
             "total": len(methods),
             "default_method": next(
-                (method.dict() for method in methods if method.is_default),
+                (method_dicts[method.id] for method in methods if method.is_default),
                 None
             )
         }
@@ -139,13 +211,9 @@ class PaymentService:
             if not all([mandate_id, payment_method_id, user_id]):
                 raise PaymentError("Missing required payment parameters")
             
-            # Find payment method
-            user_methods = self.payment_methods.get(user_id, [])
-            payment_method = next(
-                (pm for pm in user_methods if pm.id == payment_method_id),
-                None
-            )
-            
+            # Find payment method via the id index (O(1) instead of a scan)
+            payment_method = self._get_payment_method(user_id, payment_method_id)
+
             if not payment_method:
                 raise PaymentError("Invalid payment method")
             
@@ -159,12 +227,15 @@ class PaymentService:
                 mandate_id=mandate_id,
                 payment_method_id=payment_method_id,
                 expires_at=datetime.now() + timedelta(minutes=self.otp_expiry_minutes),
+                monotonic_deadline=time.monotonic() + self.otp_expiry_minutes * 60,
                 max_attempts=self.max_otp_attempts
             )
             
             # Store OTP securely
-            self.otp_store[mandate_id] = otp_data
-            
+            with _lock_for(mandate_id):
+                self._otp_store_for(mandate_id)[mandate_id] = otp_data
+            self._audit("otp_issued", mandate_id, user_id)
+
             # Log payment initiation
             self.logger.info(
                 f"Payment initiated: mandate={mandate_id}, user={user_id}, "
@@ -173,7 +244,7 @@ class PaymentService:
             
             return {
                 "mandate_id": mandate_id,
-                "payment_method": payment_method.dict(),
+                "payment_method": self._method_dicts[user_id][payment_method_id],
                 "otp_required": True,
                 "otp_sent_to": self._mask_contact_info(user_id),
                 "expires_in_seconds": self.otp_expiry_minutes * 60,
@@ -197,43 +268,64 @@ class PaymentService:
     def verify_otp(
         self,
         mandate_id: str,
-        otp_code: str,
+        otp_code: Union[str, bytes],
         user_id: str
     ) -> Dict[str, Any]:
-        """Verify OTP with enhanced security and retry logic."""
-        
+        """Verify OTP with enhanced security and retry logic.
+
+        Accepts the code as str or bytes; comparison always happens over
+        bytes so the constant-time check runs on the raw wire form
+        without a unicode normalization pass.
+        """
+
         try:
-            # Check if OTP exists
-            if mandate_id not in self.otp_store:
-                raise OTPError("Invalid mandate or OTP expired")
-            
-            otp_data = self.otp_store[mandate_id]
-            
-            # Verify user
-            if otp_data.user_id != user_id:
-                self.logger.warning(f"OTP verification: user mismatch for mandate {mandate_id}")
-                raise OTPError("Invalid user for this OTP")
-            
-            # Check expiration
-            if otp_data.is_expired():
-                del self.otp_store[mandate_id]
-                self.logger.info(f"OTP expired for mandate {mandate_id}")
-                raise OTPError("OTP has expired")
-            
-            # Check attempt limit
-            if otp_data.is_blocked():
-                del self.otp_store[mandate_id]
-                self.logger.warning(f"OTP blocked due to max attempts for mandate {mandate_id}")
-                raise OTPError("Too many failed attempts. OTP blocked.")
-            
-            # Increment attempts
-            otp_data.increment_attempts()
-            
-            # Verify OTP
-            if otp_data.otp == otp_code:
-                # OTP verified successfully
-                del self.otp_store[mandate_id]
-                
+            otp_b = otp_code.encode() if isinstance(otp_code, str) else otp_code
+            # Read-modify-write on the OTP record runs under the mandate's
+            # stripe lock; payment processing happens outside it
+            with _lock_for(mandate_id):
+                otp_store = self._otp_store_for(mandate_id)
+
+                # Check if OTP exists
+                if mandate_id not in otp_store:
+                    raise OTPError("Invalid mandate or OTP expired")
+
+                otp_data = otp_store[mandate_id]
+
+                # Verify user
+                if otp_data.user_id != user_id:
+                    self.logger.warning(f"OTP verification: user mismatch for mandate {mandate_id}")
+                    raise OTPError("Invalid user for this OTP")
+
+                # Check expiration (monotonic deadline, no datetime allocation)
+                if otp_data.is_expired():
+                    del otp_store[mandate_id]
+                    self.logger.info(f"OTP expired for mandate {mandate_id}")
+                    raise OTPError("OTP has expired")
+
+                # Check attempt limit
+                if otp_data.is_blocked():
+                    del otp_store[mandate_id]
+                    self.logger.warning(f"OTP blocked due to max attempts for mandate {mandate_id}")
+                    raise OTPError("Too many failed attempts. OTP blocked.")
+
+                # Increment attempts
+                otp_data.increment_attempts()
+
+                # Verify OTP (constant-time bytes compare, no timing leak)
+                otp_valid = hmac.compare_digest(otp_data.otp.encode(), otp_b)
+                if otp_valid:
+                    del otp_store[mandate_id]
+                else:
+                    remaining_attempts = otp_data.max_attempts - otp_data.attempts
+                    if remaining_attempts <= 0:
+                        del otp_store[mandate_id]
+
+            self._audit(
+                "otp_consumed" if otp_valid else "otp_attempt_failed",
+                mandate_id, user_id
+            )
+
+            if otp_valid:
                 # Process payment
                 transaction = self._process_payment(mandate_id, otp_data)
                 
@@ -262,24 +354,23 @@ class PaymentService:
                 }
             else:
                 # Invalid OTP
-                remaining_attempts = otp_data.max_attempts - otp_data.attempts
-                
                 self.logger.warning(
                     f"Invalid OTP for mandate {mandate_id}, "
                     f"attempts: {otp_data.attempts}/{otp_data.max_attempts}"
                 )
-                
+
                 if remaining_attempts <= 0:
-                    del self.otp_store[mandate_id]
                     raise OTPError("Maximum OTP attempts exceeded")
-                
+
                 return {
                     "status": "invalid_otp",
                     "error": f"Invalid OTP code",
                     "remaining_attempts": remaining_attempts,
                     "can_retry": True,
                     "expires_in_seconds": int(
-                        (otp_data.expires_at - datetime.now()).total_seconds()
+                        otp_data.monotonic_deadline - time.monotonic()
+                        if otp_data.monotonic_deadline is not None
+                        else (otp_data.expires_at - datetime.now()).total_seconds()
                     )
                 }
                 
@@ -297,7 +388,7 @@ class PaymentService:
         """Process the actual payment after OTP verification."""
 
         # Generate transaction ID
-        transaction_id = f"txn_{uuid.uuid4().hex[:12]}"
+        transaction_id = f"txn_{secrets.token_hex(6)}"
 
         # Get amount from mandate if available
         amount = 999.99  # Default demo amount
@@ -380,7 +471,7 @@ class PaymentService:
                 raise PaymentError("Can only refund completed transactions")
             
             # Create refund
-            refund_id = f"rfnd_{uuid.uuid4().hex[:12]}"
+            refund_id = f"rfnd_{secrets.token_hex(6)}"
             
             refund = RefundRequest(
                 refund_id=refund_id,
@@ -414,28 +505,50 @@ class PaymentService:
             self.logger.error(f"Refund processing failed: {str(e)}")
             raise PaymentError(f"Refund processing failed: {str(e)}")
     
+    def _audit(self, event: str, mandate_id: str, user_id: str) -> None:
+        """Queue an audit event for asynchronous persistence."""
+        self._audit_events.append((event, mandate_id, user_id, time.time()))
+
+    def enter_scope(self) -> None:
+        """Start fresh OTP stores for an isolated run (demos, tests).
+
+        New sub-stores with the same bounds replace the old ones in one
+        assignment instead of clear()+refill, which churns the caches and
+        mutates state under anything still holding a reference to them.
+        """
+        self._otp_stores = self._new_otp_stores()
+
+    def exit_scope(self) -> None:
+        """Drop the current scope's OTPs (scopes do not nest)."""
+        self.enter_scope()
+
+    def drain_audit_events(self, max_events: int = 100) -> List[tuple]:
+        """Pop up to max_events queued audit events for batch persistence."""
+        batch: List[tuple] = []
+        events = self._audit_events
+        while events and len(batch) < max_events:
+            batch.append(events.popleft())
+        return batch
+
     def _generate_otp(self) -> str:
         """Generate secure OTP code."""
-        return f"{random.randint(100000, 999999)}"
+        return f"{secrets.randbelow(900000) + 100000}"
     
     def _mask_contact_info(self, user_id: str) -> str:
         """Mask contact information for security."""
-        return f"***-***-{random.randint(1000, 9999)}"
+        # Cosmetic suffix: derive it from the user id instead of spending
+        # an RNG call per payment initiation (stable across processes too)
+        return f"***-***-{zlib.crc32(user_id.encode()) % 10000:04d}"
     
     def cleanup_expired_otps(self) -> int:
         """Clean up expired OTPs. Returns count of cleaned OTPs."""
-        
-        expired_otps = []
-        
-        for mandate_id, otp_data in self.otp_store.items():
-            if otp_data.is_expired():
-                expired_otps.append(mandate_id)
-        
-        # Remove expired OTPs
-        for mandate_id in expired_otps:
-            del self.otp_store[mandate_id]
-        
-        if expired_otps:
-            self.logger.info(f"Cleaned up {len(expired_otps)} expired OTPs")
-        
-        return len(expired_otps)
\ No newline at end of file
+
+        expired_count = 0
+        for stripe_lock, otp_store in zip(_LOCKS, self._otp_stores):
+            with stripe_lock:
+                expired_count += len(otp_store.expire())
+
+        if expired_count:
+            self.logger.info(f"Cleaned up {expired_count} expired OTPs")
+
+        return expired_count
\ No newline at end of file
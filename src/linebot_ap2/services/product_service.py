@@ -1,6 +1,8 @@
 """Product Service with enhanced search and recommendation capabilities."""
 
 import json
+from collections import defaultdict
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
@@ -18,12 +20,45 @@ class ProductService:
         self.logger = setup_logger("product_service")
         self.products: Dict[str, Product] = {}
         self.shopping_carts: Dict[str, ShoppingCart] = {}
-        
+
         # Initialize demo products
         self._init_demo_products()
-        
+
+        # Secondary index for O(1) category lookups (products are only
+        # mutated in place, so the index stays valid after stock changes)
+        self._products_by_category: Dict[ProductCategory, List[Product]] = defaultdict(list)
+        for product in self.products.values():
+            self._products_by_category[product.category].append(product)
+
+        # Precomputed lowercased search text per product - avoids
+        # re-lowercasing name/description/brand/tags on every search
+        self._search_blobs: Dict[str, str] = {
+            product_id: self._build_search_blob(product)
+            for product_id, product in self.products.items()
+        }
+
+        # Memoized search/recommendation paths - the catalog only changes
+        # through stock updates, which clear these caches
+        self._search_cached = lru_cache(maxsize=1024)(self._search_products_uncached)
+        self._recommendations_cached = lru_cache(maxsize=256)(self._get_recommendations_uncached)
+
         self.logger.info("✓ Product service initialized with demo products")
-    
+
+    @staticmethod
+    def _build_search_blob(product: Product) -> str:
+        """Build the lowercased text a query is matched against."""
+        return " ".join([
+            product.name.lower(),
+            product.description.lower(),
+            product.brand.lower() if product.brand else "",
+            " ".join(product.tags).lower()
+        ])
+
+    def _invalidate_caches(self) -> None:
+        """Clear memoized search results after a catalog change."""
+        self._search_cached.cache_clear()
+        self._recommendations_cached.cache_clear()
+
     def _init_demo_products(self):
         """Initialize demo product catalog."""
         
@@ -153,8 +188,20 @@ class ProductService:
         brand: str = "",
         in_stock_only: bool = True
     ) -> ProductSearchResult:
-        """Enhanced product search with multiple filters."""
-        
+        """Enhanced product search with multiple filters (memoized)."""
+        return self._search_cached(query, category, min_price, max_price, brand, in_stock_only)
+
+    def _search_products_uncached(
+        self,
+        query: str = "",
+        category: str = "",
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        brand: str = "",
+        in_stock_only: bool = True
+    ) -> ProductSearchResult:
+        """Run the actual filter scan behind the memoized entry point."""
+
         # Create search filters
         filters = ProductSearchFilters(
             query=query.strip() if query else None,
@@ -165,10 +212,15 @@ class ProductService:
             in_stock_only=in_stock_only
         )
         
-        # Apply filters
+        # Apply filters - narrow the scan to the category bucket when possible
+        if filters.category:
+            candidates = self._products_by_category.get(filters.category, [])
+        else:
+            candidates = self.products.values()
+
         results = []
-        
-        for product in self.products.values():
+
+        for product in candidates:
             if self._matches_filters(product, filters):
                 results.append(product)
         
@@ -193,16 +245,9 @@ class ProductService:
         if filters.in_stock_only and not product.is_available:
             return False
         
-        # Query filter (search in name, description, brand, tags)
+        # Query filter (search in precomputed name/description/brand/tags blob)
         if filters.query:
-            query_lower = filters.query.lower()
-            searchable_text = " ".join([
-                product.name.lower(),
-                product.description.lower(),
-                product.brand.lower() if product.brand else "",
-                " ".join(product.tags).lower()
-            ])
-            if query_lower not in searchable_text:
+            if filters.query.lower() not in self._search_blobs[product.id]:
                 return False
         
         # Category filter
@@ -301,8 +346,17 @@ class ProductService:
         category: str = "",
         limit: int = 4
     ) -> List[Dict[str, Any]]:
-        """Get personalized product recommendations."""
-        
+        """Get personalized product recommendations (memoized)."""
+        return self._recommendations_cached(user_preferences, category, limit)
+
+    def _get_recommendations_uncached(
+        self,
+        user_preferences: str = "",
+        category: str = "",
+        limit: int = 4
+    ) -> List[Dict[str, Any]]:
+        """Build the recommendation list behind the memoized entry point."""
+
         recommendations = []
         
         if user_preferences:
@@ -329,6 +383,19 @@ class ProductService:
         
         return recommendations
     
+    def enter_scope(self) -> None:
+        """Start a fresh cart store for an isolated run (demos, tests).
+
+        Rebinding replaces the table in O(1) instead of clear()+refill,
+        which churns the shared dict's hash table and mutates state under
+        anything still holding a reference to it.
+        """
+        self.shopping_carts = {}
+
+    def exit_scope(self) -> None:
+        """Drop the current scope's carts (scopes do not nest)."""
+        self.enter_scope()
+
     def get_shopping_cart(self, user_id: str) -> ShoppingCart:
         """Get or create shopping cart for user."""
         
@@ -403,8 +470,9 @@ class ProductService:
         """Reduce product stock after successful payment."""
         
         product = self.products.get(product_id)
-        if product:
-            return product.reduce_stock(quantity)
+        if product and product.reduce_stock(quantity):
+            self._invalidate_caches()
+            return True
         return False
     
     def get_product_categories(self) -> List[Dict[str, Any]]:
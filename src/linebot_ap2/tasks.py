@@ -0,0 +1,135 @@
+"""Celery tasks for offloading long-running agent flows to worker pools.
+
+Importing this module requires the optional celery extra (plus redis for
+the broker); the web process only imports it when CELERY_BROKER_URL is
+configured. Payment flows get their own queue so they are never starved
+behind shopping traffic, and transient Gemini failures retry for free.
+
+Sessions are shared across processes via the Redis session store, but
+OTP and mandate state (PaymentService / MandateService) is still held in
+per-process in-memory singletons. The initiate-payment message and the
+OTP-verify message must therefore land on the same worker process, or
+verification fails with "Invalid mandate or OTP expired". Until that
+state moves to Redis alongside sessions, run the payment queue with
+exactly one worker process; shopping can scale freely. From the repo
+root (the module lives under the src/ layout):
+
+    celery -A src.linebot_ap2.tasks worker -Q agents.payment -c 1
+    celery -A src.linebot_ap2.tasks worker -Q agents.shopping
+"""
+
+import asyncio
+
+from celery import Celery
+
+from .config import get_settings
+
+settings = get_settings()
+
+# Explicit task name shared by the route below and the task decorator.
+# The default name is derived from the import path, which differs
+# between the web process (src.linebot_ap2.tasks) and however a worker
+# imports the module — a mismatch silently drops the payment route and
+# makes workers reject the other side's messages as unregistered
+_RUN_AGENT_TASK = "linebot_ap2.tasks.run_agent"
+
+celery_app = Celery("linebot_ap2", broker=settings.celery_broker_url)
+celery_app.conf.update(
+    task_default_queue="agents.shopping",
+    task_routes={
+        _RUN_AGENT_TASK: {"queue": "agents.payment"}
+    }
+)
+
+# Worker-side singletons, built once per worker process
+_runners = None
+_session_manager = None
+
+
+def _get_runner(intent: str):
+    """Build (once) and return the runner for the given intent."""
+    global _runners, _session_manager
+
+    if _runners is None:
+        from google.adk.runners import Runner
+
+        from .agents import (
+            create_enhanced_payment_agent,
+            create_enhanced_shopping_agent
+        )
+        from .common import SessionManager
+
+        # Sessions must be shared with the web process, so workers only
+        # make sense with the Redis session store configured
+        _session_manager = SessionManager(
+            settings.app_name,
+            config={"redis_url": settings.redis_url}
+        )
+
+        _runners = {
+            "payment": Runner(
+                agent=create_enhanced_payment_agent(
+                    model=settings.default_model,
+                    max_otp_attempts=settings.max_otp_attempts,
+                    otp_expiry_minutes=settings.otp_expiry_minutes
+                ),
+                app_name=settings.app_name,
+                session_service=_session_manager.session_service
+            ),
+            "shopping": Runner(
+                agent=create_enhanced_shopping_agent(
+                    model=settings.default_model
+                ),
+                app_name=settings.app_name,
+                session_service=_session_manager.session_service
+            )
+        }
+
+    return _runners.get(intent, _runners["shopping"])
+
+
+async def _run_agent_async(
+    user_id: str, session_id: str, message: str, intent: str
+) -> str:
+    """Drain one run_async stream inside the worker."""
+    from google.genai import types
+
+    runner = _get_runner(intent)
+    content = types.Content.model_construct(
+        role="user", parts=[types.Part.model_construct(text=message)]
+    )
+
+    async for event in runner.run_async(
+        user_id=user_id, session_id=session_id, new_message=content
+    ):
+        if event.is_final_response():
+            if event.content and event.content.parts:
+                text_parts = [
+                    part.text for part in event.content.parts
+                    if hasattr(part, 'text') and part.text
+                ]
+                if text_parts:
+                    return "\n".join(text_parts)
+
+            if event.actions and event.actions.escalate:
+                return f"Agent escalated: {event.error_message or 'No specific message.'}"
+
+    return "抱歉，無法處理您的請求。"
+
+
+@celery_app.task(bind=True, name=_RUN_AGENT_TASK, max_retries=3, default_retry_delay=2)
+def run_agent(self, user_id: str, session_id: str, message: str, intent: str):
+    """Run one agent call in the worker and push the reply to LINE."""
+    try:
+        response = asyncio.run(
+            _run_agent_async(user_id, session_id, message, intent)
+        )
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
+    from linebot import LineBotApi
+    from linebot.models import TextSendMessage
+
+    LineBotApi(settings.line_channel_access_token).push_message(
+        user_id, TextSendMessage(text=response)
+    )
@@ -1,11 +1,11 @@
 """Enhanced payment tools using the new service architecture."""
 
-import json
-from typing import Optional
+from typing import Optional, Union
 
 from ..services import get_payment_service, get_mandate_service, get_product_service, get_credential_provider
 from ..services.payment_service import PaymentError, OTPError
 from ..common.logger import setup_logger
+from ..common.serialization import json_dumps
 
 # Use shared service instances to ensure data consistency across agents
 _payment_service = get_payment_service()
@@ -14,6 +14,45 @@ _product_service = get_product_service()
 _credential_provider = get_credential_provider()
 _logger = setup_logger("payment_tools")
 
+# Static response fragments - built once at import time instead of per call
+_SECURITY_FEATURES = {
+    "payment_encryption": "AES-256",
+    "pci_compliance": "Level 1",
+    "fraud_protection": "Enabled",
+    "3d_secure": "Supported"
+}
+
+_AP2_COMPLIANCE_INFO = {
+    "mandate_signing": "HMAC-SHA256",
+    "secure_otp": "Enabled",
+    "transaction_logging": "Full audit trail"
+}
+
+_FULFILLMENT_INFO = {
+    "order_processing": "Initiated",
+    "estimated_delivery": "2-3 business days",
+    "tracking_available": "Within 24 hours",
+    "customer_service": "Available 24/7"
+}
+
+_VERIFY_AP2_COMPLIANCE = {
+    "mandate_fulfilled": True,
+    "transaction_signed": True,
+    "audit_trail": "Complete"
+}
+
+_CUSTOMER_INFO = {
+    "receipt_sent": True,
+    "support_available": "24/7",
+    "refund_policy": "30 days"
+}
+
+_MANDATE_USER_INFO = {
+    "secure_processing": "Your payment is protected by industry-standard encryption",
+    "privacy": "Your data is handled according to our privacy policy",
+    "support": "Customer service available 24/7"
+}
+
 
 def enhanced_get_payment_methods(user_id: str) -> str:
     """
@@ -32,49 +71,33 @@ def enhanced_get_payment_methods(user_id: str) -> str:
         result = _payment_service.get_user_payment_methods(user_id)
         
         # Add security and compliance info
-        result["security_features"] = {
-            "payment_encryption": "AES-256",
-            "pci_compliance": "Level 1",
-            "fraud_protection": "Enabled",
-            "3d_secure": "Supported"
-        }
-        
-        result["ap2_compliance"] = {
-            "mandate_signing": "HMAC-SHA256",
-            "secure_otp": "Enabled",
-            "transaction_logging": "Full audit trail"
-        }
+        result["security_features"] = _SECURITY_FEATURES
+        result["ap2_compliance"] = _AP2_COMPLIANCE_INFO
         
         _logger.info(f"Retrieved {result['total']} payment methods")
-        return json.dumps(result, default=str)
+        return json_dumps(result)
         
     except Exception as e:
         _logger.error(f"Get payment methods error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Failed to get payment methods: {str(e)}",
             "user_id": user_id,
             "payment_methods": []
         })
 
 
-def enhanced_initiate_payment(
+# Hot tools are split into a dict-returning _impl plus a thin string
+# wrapper: agents still get JSON strings (ADK requirement) while
+# in-process callers such as the demo script use the dicts directly and
+# skip the encode+decode round trip.
+
+def _initiate_payment_impl(
     mandate_id: str,
     payment_method_id: str,
     user_id: str,
     amount: Optional[float] = None
-) -> str:
-    """
-    Initiate payment with enhanced security and AP2 compliance.
-    
-    Args:
-        mandate_id: Cart mandate ID
-        payment_method_id: Selected payment method
-        user_id: User identifier
-        amount: Payment amount (optional, will use mandate amount)
-        
-    Returns:
-        JSON string with payment initiation details and OTP info
-    """
+) -> dict:
+    """Dict-returning core of enhanced_initiate_payment."""
     try:
         _logger.info(f"Initiating payment: mandate={mandate_id}, user={user_id}, method={payment_method_id}")
 
@@ -99,7 +122,7 @@ def enhanced_initiate_payment(
                     f"Mandate {mandate_id} not found. User {user_id} has {len(user_mandates)} active mandate(s)"
                 )
 
-                return json.dumps({
+                return {
                     "error": "mandate_not_found",
                     "message": (
                         f"訂單號 {mandate_id} 不存在於系統中。\n\n"
@@ -115,30 +138,30 @@ def enhanced_initiate_payment(
                     "user_active_mandates_count": len(user_mandates),
                     "status": "failed",
                     "suggestion": "use_get_user_mandates_tool" if user_mandates else "create_new_cart_with_shopping_agent"
-                })
+                }
 
             # Mandate exists but is invalid (expired or wrong status)
             _logger.error(
                 f"Mandate info: status={mandate_info.status.value}, "
                 f"expires_at={mandate_info.expires_at.isoformat() if mandate_info.expires_at else 'None'}"
             )
-            return json.dumps({
+            return {
                 "error": "mandate_invalid",
                 "message": f"訂單號 {mandate_id} 已失效（狀態：{mandate_info.status.value}）",
                 "mandate_id": mandate_id,
                 "status": "failed",
                 "mandate_status": mandate_info.status.value,
                 "suggestion": "create_new_cart_with_shopping_agent"
-            })
+            }
         
         # Get mandate details for amount if not provided
         mandate_details = _mandate_service.get_mandate_details(mandate_id)
         if "error" in mandate_details:
-            return json.dumps({
+            return {
                 "error": "Mandate not found",
                 "mandate_id": mandate_id,
                 "status": "failed"
-            })
+            }
         
         if amount is None:
             amount = mandate_details["mandate"]["total_amount"]
@@ -177,22 +200,48 @@ def enhanced_initiate_payment(
         }
 
         _logger.info(f"Payment initiated successfully: {mandate_id}, OTP={result.get('otp_code')}")
-        return json.dumps(result, default=str)
-        
+        return result
+
     except PaymentError as e:
         _logger.error(f"Payment initiation error: {str(e)}")
-        return json.dumps({
+        return {
             "error": str(e),
             "mandate_id": mandate_id,
             "status": "failed"
-        })
+        }
     except Exception as e:
         _logger.error(f"Unexpected payment error: {str(e)}")
-        return json.dumps({
+        return {
             "error": f"Payment initiation failed: {str(e)}",
             "mandate_id": mandate_id,
             "status": "failed"
-        })
+        }
+
+
+def enhanced_initiate_payment(
+    mandate_id: str,
+    payment_method_id: str,
+    user_id: str,
+    amount: Optional[float] = None
+) -> str:
+    """
+    Initiate payment with enhanced security and AP2 compliance.
+
+    Args:
+        mandate_id: Cart mandate ID
+        payment_method_id: Selected payment method
+        user_id: User identifier
+        amount: Payment amount (optional, will use mandate amount)
+
+    Returns:
+        JSON string with payment initiation details and OTP info
+    """
+    return json_dumps(_initiate_payment_impl(
+        mandate_id=mandate_id,
+        payment_method_id=payment_method_id,
+        user_id=user_id,
+        amount=amount
+    ))
 
 
 def initiate_payment_with_token(
@@ -217,7 +266,7 @@ def initiate_payment_with_token(
 
         # Validate token
         if not _credential_provider.validate_token(token_id):
-            return json.dumps({
+            return json_dumps({
                 "error": "Invalid or expired token",
                 "token_id": token_id,
                 "status": "failed"
@@ -226,7 +275,7 @@ def initiate_payment_with_token(
         # Get token info
         token = _credential_provider.get_token(token_id)
         if not token or token.mandate_id != mandate_id:
-            return json.dumps({
+            return json_dumps({
                 "error": "Token not bound to this mandate",
                 "token_id": token_id,
                 "mandate_id": mandate_id,
@@ -235,7 +284,7 @@ def initiate_payment_with_token(
 
         # Verify mandate
         if not _mandate_service.is_mandate_valid(mandate_id):
-            return json.dumps({
+            return json_dumps({
                 "error": "Invalid or expired mandate",
                 "mandate_id": mandate_id,
                 "status": "failed"
@@ -270,32 +319,26 @@ def initiate_payment_with_token(
         }
 
         _logger.info(f"Payment initiated with token: {token_id}")
-        return json.dumps(result, default=str)
+        return json_dumps(result)
 
     except Exception as e:
         _logger.error(f"Token payment error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Payment initiation failed: {str(e)}",
             "mandate_id": mandate_id,
             "status": "failed"
         })
 
 
-def enhanced_verify_otp(
+def _verify_otp_impl(
     mandate_id: str,
-    otp_code: str,
+    otp_code: Union[str, bytes],
     user_id: str
-) -> str:
-    """
-    Verify OTP with enhanced security and transaction processing.
-    
-    Args:
-        mandate_id: Cart mandate ID
-        otp_code: OTP code entered by user
-        user_id: User identifier
-        
-    Returns:
-        JSON string with verification result and transaction details
+) -> dict:
+    """Dict-returning core of enhanced_verify_otp.
+
+    In-process callers may pass the OTP as bytes to keep the comparison
+    on the raw wire form; the agent-facing wrapper stays str-only.
     """
     try:
         _logger.info(f"Verifying OTP: mandate={mandate_id}, user={user_id}")
@@ -313,52 +356,58 @@ def enhanced_verify_otp(
             _mandate_service.update_mandate_status(mandate_id, "completed")
             
             # Add fulfillment information
-            result["fulfillment"] = {
-                "order_processing": "Initiated",
-                "estimated_delivery": "2-3 business days",
-                "tracking_available": "Within 24 hours",
-                "customer_service": "Available 24/7"
-            }
-            
+            result["fulfillment"] = _FULFILLMENT_INFO
+
             # Add AP2 compliance confirmation
-            result["ap2_compliance"] = {
-                "mandate_fulfilled": True,
-                "transaction_signed": True,
-                "audit_trail": "Complete"
-            }
+            result["ap2_compliance"] = _VERIFY_AP2_COMPLIANCE
             
             _logger.info(f"OTP verified and payment completed: {result.get('transaction_id')}")
         else:
             _logger.warning(f"OTP verification failed: {result.get('error', 'Unknown error')}")
-        
-        return json.dumps(result, default=str)
-        
+
+        return result
+
     except OTPError as e:
         _logger.error(f"OTP verification error: {str(e)}")
-        return json.dumps({
+        return {
             "error": str(e),
             "mandate_id": mandate_id,
             "status": "failed"
-        })
+        }
     except Exception as e:
         _logger.error(f"Unexpected OTP error: {str(e)}")
-        return json.dumps({
+        return {
             "error": f"OTP verification failed: {str(e)}",
             "mandate_id": mandate_id,
             "status": "failed"
-        })
+        }
 
 
-def enhanced_get_transaction_status(transaction_id: str) -> str:
+def enhanced_verify_otp(
+    mandate_id: str,
+    otp_code: str,
+    user_id: str
+) -> str:
     """
-    Get comprehensive transaction status with audit trail.
-    
+    Verify OTP with enhanced security and transaction processing.
+
     Args:
-        transaction_id: Transaction identifier
-        
+        mandate_id: Cart mandate ID
+        otp_code: OTP code entered by user
+        user_id: User identifier
+
     Returns:
-        JSON string with detailed transaction status
+        JSON string with verification result and transaction details
     """
+    return json_dumps(_verify_otp_impl(
+        mandate_id=mandate_id,
+        otp_code=otp_code,
+        user_id=user_id
+    ))
+
+
+def _transaction_status_impl(transaction_id: str) -> dict:
+    """Dict-returning core of enhanced_get_transaction_status."""
     try:
         _logger.info(f"Getting transaction status: {transaction_id}")
         
@@ -375,20 +424,29 @@ def enhanced_get_transaction_status(transaction_id: str) -> str:
                 "fraud_check": "Passed"
             }
             
-            result["customer_info"] = {
-                "receipt_sent": True,
-                "support_available": "24/7",
-                "refund_policy": "30 days"
-            }
-        
-        return json.dumps(result, default=str)
-        
+            result["customer_info"] = _CUSTOMER_INFO
+
+        return result
+
     except Exception as e:
         _logger.error(f"Transaction status error: {str(e)}")
-        return json.dumps({
+        return {
             "error": f"Failed to get transaction status: {str(e)}",
             "transaction_id": transaction_id
-        })
+        }
+
+
+def enhanced_get_transaction_status(transaction_id: str) -> str:
+    """
+    Get comprehensive transaction status with audit trail.
+
+    Args:
+        transaction_id: Transaction identifier
+
+    Returns:
+        JSON string with detailed transaction status
+    """
+    return json_dumps(_transaction_status_impl(transaction_id=transaction_id))
 
 
 def enhanced_process_refund(
@@ -433,18 +491,18 @@ def enhanced_process_refund(
             }
         
         _logger.info(f"Refund processed: {result.get('refund_id')}")
-        return json.dumps(result, default=str)
+        return json_dumps(result)
         
     except PaymentError as e:
         _logger.error(f"Refund processing error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": str(e),
             "transaction_id": transaction_id,
             "status": "failed"
         })
     except Exception as e:
         _logger.error(f"Unexpected refund error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Refund processing failed: {str(e)}",
             "transaction_id": transaction_id,
             "status": "failed"
@@ -466,17 +524,13 @@ def get_mandate_details(mandate_id: str) -> str:
         
         if "error" not in details:
             # Add user-friendly information
-            details["user_info"] = {
-                "secure_processing": "Your payment is protected by industry-standard encryption",
-                "privacy": "Your data is handled according to our privacy policy",
-                "support": "Customer service available 24/7"
-            }
+            details["user_info"] = _MANDATE_USER_INFO
         
-        return json.dumps(details, default=str)
+        return json_dumps(details)
         
     except Exception as e:
         _logger.error(f"Get mandate details error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Failed to get mandate details: {str(e)}",
             "mandate_id": mandate_id
         })
@@ -518,11 +572,11 @@ def get_user_mandates(user_id: str) -> str:
             response["message"] = f"您有 {len(mandates)} 個有效的支付訂單"
 
         _logger.info(f"Found {len(mandates)} active mandate(s) for user {user_id}")
-        return json.dumps(response, default=str)
+        return json_dumps(response)
 
     except Exception as e:
         _logger.error(f"Get user mandates error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Failed to get user mandates: {str(e)}",
             "user_id": user_id,
             "active_mandates": []
@@ -551,11 +605,11 @@ def cleanup_expired_data() -> str:
         }
 
         _logger.info(f"Cleanup completed: {expired_otps} OTPs, {expired_mandates} mandates")
-        return json.dumps(result, default=str)
+        return json_dumps(result)
 
     except Exception as e:
         _logger.error(f"Cleanup error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Cleanup failed: {str(e)}",
             "cleanup_completed": False
         })
\ No newline at end of file
@@ -1,11 +1,11 @@
 """Enhanced shopping tools using the new service architecture."""
 
-import json
 from typing import Optional
 
 from ..services import get_product_service, get_mandate_service, get_credential_provider
 from ..models.product import ProductCategory
 from ..common.logger import setup_logger
+from ..common.serialization import json_dumps
 
 # Use shared service instances to ensure data consistency across agents
 _product_service = get_product_service()
@@ -14,28 +14,21 @@ _credential_provider = get_credential_provider()
 _logger = setup_logger("shopping_tools")
 
 
-def enhanced_search_products(
+# Each tool below is split into a dict-returning _impl and a thin string
+# wrapper. ADK agents need string tool outputs, but in-process callers
+# (the demo script) can use the _impl directly and skip a full JSON
+# encode+decode round trip per call.
+
+def _search_products_impl(
     query: str = "",
     category: str = "",
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     brand: str = "",
-    in_stock_only: bool = True
-) -> str:
-    """
-    Enhanced product search with advanced filtering capabilities.
-    
-    Args:
-        query: Search term for product name, description, or tags
-        category: Product category filter (Electronics, Computers, Audio, etc.)
-        min_price: Minimum price filter
-        max_price: Maximum price filter  
-        brand: Brand name filter
-        in_stock_only: Show only products in stock
-        
-    Returns:
-        JSON string with search results and metadata
-    """
+    in_stock_only: bool = True,
+    details_top_k: int = 0
+) -> dict:
+    """Dict-returning core of enhanced_search_products."""
     try:
         _logger.info(f"Product search: query='{query}', category='{category}', price_range={min_price}-{max_price}")
         
@@ -61,17 +54,59 @@ def enhanced_search_products(
                 "total_catalog_size": len(_product_service.products)
             }
         }
-        
+
+        if details_top_k > 0:
+            response["details"] = [
+                _product_service.get_product_details(product.id)
+                for product in result.products[:details_top_k]
+            ]
+
         _logger.info(f"Search returned {result.total} products")
-        return json.dumps(response, default=str)
-        
+        return response
+
     except Exception as e:
         _logger.error(f"Product search error: {str(e)}")
-        return json.dumps({
+        return {
             "error": f"Search failed: {str(e)}",
             "products": [],
             "total": 0
-        })
+        }
+
+
+def enhanced_search_products(
+    query: str = "",
+    category: str = "",
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    brand: str = "",
+    in_stock_only: bool = True,
+    details_top_k: int = 0
+) -> str:
+    """
+    Enhanced product search with advanced filtering capabilities.
+
+    Args:
+        query: Search term for product name, description, or tags
+        category: Product category filter (Electronics, Computers, Audio, etc.)
+        min_price: Minimum price filter
+        max_price: Maximum price filter
+        brand: Brand name filter
+        in_stock_only: Show only products in stock
+        details_top_k: Embed full detail payloads for the first k results,
+            saving callers a separate enhanced_get_product_details round trip
+
+    Returns:
+        JSON string with search results and metadata
+    """
+    return json_dumps(_search_products_impl(
+        query=query,
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        brand=brand,
+        in_stock_only=in_stock_only,
+        details_top_k=details_top_k
+    ))
 
 
 def enhanced_get_product_details(product_id: str) -> str:
@@ -90,17 +125,17 @@ def enhanced_get_product_details(product_id: str) -> str:
         details = _product_service.get_product_details(product_id)
         
         if not details:
-            return json.dumps({
+            return json_dumps({
                 "error": "Product not found",
                 "product_id": product_id
             })
         
         _logger.info(f"Product details retrieved for: {product_id}")
-        return json.dumps(details, default=str)
+        return json_dumps(details)
         
     except Exception as e:
         _logger.error(f"Product details error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Failed to get product details: {str(e)}",
             "product_id": product_id
         })
@@ -140,32 +175,22 @@ def enhanced_get_recommendations(
         }
         
         _logger.info(f"Generated {len(recommendations)} recommendations")
-        return json.dumps(response, default=str)
+        return json_dumps(response)
         
     except Exception as e:
         _logger.error(f"Recommendations error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Failed to get recommendations: {str(e)}",
             "recommendations": []
         })
 
 
-def enhanced_add_to_cart(
+def _add_to_cart_impl(
     user_id: str,
-    product_id: str, 
+    product_id: str,
     quantity: int = 1
-) -> str:
-    """
-    Add product to user's shopping cart.
-    
-    Args:
-        user_id: User identifier
-        product_id: Product to add
-        quantity: Number of items
-        
-    Returns:
-        JSON string with cart update result
-    """
+) -> dict:
+    """Dict-returning core of enhanced_add_to_cart."""
     try:
         _logger.info(f"Adding to cart: user={user_id}, product={product_id}, qty={quantity}")
         
@@ -179,32 +204,46 @@ def enhanced_add_to_cart(
             _logger.warning(f"Add to cart failed: {result['error']}")
         else:
             _logger.info(f"Product added to cart successfully")
-        
-        return json.dumps(result, default=str)
-        
+
+        return result
+
     except Exception as e:
         _logger.error(f"Add to cart error: {str(e)}")
-        return json.dumps({
+        return {
             "error": f"Failed to add to cart: {str(e)}",
             "user_id": user_id,
             "product_id": product_id
-        })
+        }
 
 
-def enhanced_create_cart_mandate(
+def enhanced_add_to_cart(
     user_id: str,
-    expires_in_minutes: int = 30
+    product_id: str,
+    quantity: int = 1
 ) -> str:
     """
-    Create AP2-compliant cart mandate for payment processing.
-    
+    Add product to user's shopping cart.
+
     Args:
         user_id: User identifier
-        expires_in_minutes: Mandate expiration time
-        
+        product_id: Product to add
+        quantity: Number of items
+
     Returns:
-        JSON string with signed mandate details
+        JSON string with cart update result
     """
+    return json_dumps(_add_to_cart_impl(
+        user_id=user_id,
+        product_id=product_id,
+        quantity=quantity
+    ))
+
+
+def _create_cart_mandate_impl(
+    user_id: str,
+    expires_in_minutes: int = 30
+) -> dict:
+    """Dict-returning core of enhanced_create_cart_mandate."""
     try:
         _logger.info(f"Creating cart mandate for user: {user_id}")
         
@@ -213,7 +252,7 @@ def enhanced_create_cart_mandate(
         
         if "error" in cart_data:
             _logger.warning(f"Cart mandate creation failed: {cart_data['error']}")
-            return json.dumps(cart_data)
+            return cart_data
         
         # Create signed mandate using mandate service
         signed_mandate = _mandate_service.create_signed_mandate(
@@ -231,14 +270,34 @@ def enhanced_create_cart_mandate(
         }
         
         _logger.info(f"Cart mandate created: {signed_mandate['mandate']['id']}")
-        return json.dumps(signed_mandate, default=str)
-        
+        return signed_mandate
+
     except Exception as e:
         _logger.error(f"Cart mandate creation error: {str(e)}")
-        return json.dumps({
+        return {
             "error": f"Failed to create cart mandate: {str(e)}",
             "user_id": user_id
-        })
+        }
+
+
+def enhanced_create_cart_mandate(
+    user_id: str,
+    expires_in_minutes: int = 30
+) -> str:
+    """
+    Create AP2-compliant cart mandate for payment processing.
+
+    Args:
+        user_id: User identifier
+        expires_in_minutes: Mandate expiration time
+
+    Returns:
+        JSON string with signed mandate details
+    """
+    return json_dumps(_create_cart_mandate_impl(
+        user_id=user_id,
+        expires_in_minutes=expires_in_minutes
+    ))
 
 
 def get_product_categories() -> str:
@@ -260,11 +319,11 @@ def get_product_categories() -> str:
             }
         }
         
-        return json.dumps(response, default=str)
+        return json_dumps(response)
         
     except Exception as e:
         _logger.error(f"Get categories error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Failed to get categories: {str(e)}",
             "categories": []
         })
@@ -295,11 +354,11 @@ def get_shopping_cart(user_id: str) -> str:
             }
         }
 
-        return json.dumps(response, default=str)
+        return json_dumps(response)
 
     except Exception as e:
         _logger.error(f"Get cart error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Failed to get cart: {str(e)}",
             "user_id": user_id
         })
@@ -339,36 +398,24 @@ def get_user_mandates(user_id: str) -> str:
             )
 
         _logger.info(f"Found {len(mandates)} active mandate(s) for user {user_id}")
-        return json.dumps(response, default=str)
+        return json_dumps(response)
 
     except Exception as e:
         _logger.error(f"Get user mandates error: {str(e)}")
-        return json.dumps({
+        return json_dumps({
             "error": f"Failed to get user mandates: {str(e)}",
             "user_id": user_id,
             "active_mandates": []
         })
 
 
-def get_eligible_payment_methods(
+def _eligible_payment_methods_impl(
     user_id: str,
     amount: float,
     currency: str = "USD",
     merchant_accepted_types: str = ""
-) -> str:
-    """
-    Get eligible payment methods for a transaction.
-    Per AP2 spec: Credential Provider returns methods matching transaction context.
-
-    Args:
-        user_id: User identifier
-        amount: Transaction amount
-        currency: Transaction currency (default: USD)
-        merchant_accepted_types: Comma-separated list of accepted types (e.g., "card,wallet")
-
-    Returns:
-        JSON string with eligible payment methods
-    """
+) -> dict:
+    """Dict-returning core of get_eligible_payment_methods."""
     try:
         _logger.info(f"Getting eligible payment methods for user {user_id}, amount={amount} {currency}")
 
@@ -409,50 +456,66 @@ def get_eligible_payment_methods(
             response["message"] = "No eligible payment methods found. Please add a payment method."
 
         _logger.info(f"Found {len(methods)} eligible methods")
-        return json.dumps(response, default=str)
+        return response
 
     except Exception as e:
         _logger.error(f"Get eligible methods error: {str(e)}")
-        return json.dumps({
+        return {
             "error": f"Failed to get eligible methods: {str(e)}",
             "user_id": user_id,
             "eligible_methods": []
-        })
+        }
 
 
-def issue_payment_token_for_mandate(
+def get_eligible_payment_methods(
     user_id: str,
-    credential_id: str,
-    mandate_id: str
+    amount: float,
+    currency: str = "USD",
+    merchant_accepted_types: str = ""
 ) -> str:
     """
-    Issue a payment token for a mandate.
-    Per AP2 spec: Token binds credential to specific mandate for secure payment.
+    Get eligible payment methods for a transaction.
+    Per AP2 spec: Credential Provider returns methods matching transaction context.
 
     Args:
         user_id: User identifier
-        credential_id: Selected payment credential
-        mandate_id: Mandate to bind token to
+        amount: Transaction amount
+        currency: Transaction currency (default: USD)
+        merchant_accepted_types: Comma-separated list of accepted types (e.g., "card,wallet")
 
     Returns:
-        JSON string with token info
+        JSON string with eligible payment methods
     """
+    return json_dumps(_eligible_payment_methods_impl(
+        user_id=user_id,
+        amount=amount,
+        currency=currency,
+        merchant_accepted_types=merchant_accepted_types
+    ))
+
+
+def _issue_payment_token_impl(
+    user_id: str,
+    credential_id: str,
+    mandate_id: str
+) -> dict:
+    """Dict-returning core of issue_payment_token_for_mandate."""
     try:
         _logger.info(f"Issuing payment token: user={user_id}, credential={credential_id}, mandate={mandate_id}")
 
         # Get mandate to verify and get amount
         mandate = _mandate_service.get_mandate(mandate_id)
         if not mandate:
-            return json.dumps({
+            return {
                 "error": "Mandate not found",
                 "mandate_id": mandate_id
-            })
+            }
 
         if mandate.user_id != user_id:
-            return json.dumps({
+            return {
                 "error": "User ID mismatch",
                 "mandate_id": mandate_id
-            })
+            }
 
         # Issue token
         token = _credential_provider.issue_payment_token(
@@ -463,11 +526,11 @@ def issue_payment_token_for_mandate(
         )
 
         if not token:
-            return json.dumps({
+            return {
                 "error": "Failed to issue token. Credential may be invalid or does not support this transaction.",
                 "credential_id": credential_id,
                 "mandate_id": mandate_id
-            })
+            }
 
         # Update mandate with token
         mandate.payment_method_token = token.token_id
@@ -485,12 +548,36 @@ def issue_payment_token_for_mandate(
         }
 
         _logger.info(f"Token issued: {token.token_id}")
-        return json.dumps(response, default=str)
+        return response
 
     except Exception as e:
         _logger.error(f"Issue token error: {str(e)}")
-        return json.dumps({
+        return {
             "error": f"Failed to issue token: {str(e)}",
             "credential_id": credential_id,
             "mandate_id": mandate_id
-        })
\ No newline at end of file
+        }
+
+
+def issue_payment_token_for_mandate(
+    user_id: str,
+    credential_id: str,
+    mandate_id: str
+) -> str:
+    """
+    Issue a payment token for a mandate.
+    Per AP2 spec: Token binds credential to specific mandate for secure payment.
+
+    Args:
+        user_id: User identifier
+        credential_id: Selected payment credential
+        mandate_id: Mandate to bind token to
+
+    Returns:
+        JSON string with token info
+    """
+    return json_dumps(_issue_payment_token_impl(
+        user_id=user_id,
+        credential_id=credential_id,
+        mandate_id=mandate_id
+    ))
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""Test intent detection scoring, pattern parity and the OTP fast path."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.linebot_ap2.common.intent_detector import IntentDetector, IntentType
+
+
+def test_overlapping_patterns_all_score():
+    """Patterns whose matches overlap in the message must all count."""
+    detector = IntentDetector()
+
+    result = detector.detect_intent("我要買 iphone 然後要付款")
+
+    # Shopping scores its pattern plus keywords even though the payment
+    # pattern's match overlaps the same span of the message
+    assert result["all_scores"]["shopping"] >= 4.0
+    assert result["all_scores"]["payment"] >= 2.0
+    # Payment keeps routing priority whenever it scores at all
+    assert result["intent"] is IntentType.PAYMENT
+    assert result["confidence"] >= 0.8
+
+
+def test_matched_patterns_agree_with_individual_search():
+    """Reported patterns match what per-pattern search finds."""
+    detector = IntentDetector()
+
+    messages = [
+        "我要買 iphone 然後要付款",
+        "proceed with the payment please",
+        "search for a laptop",
+        "show me that product",
+    ]
+
+    for message in messages:
+        result = detector.detect_intent(message)
+        expected = [
+            pattern.pattern
+            for pattern in detector.patterns.get(result["intent"], [])
+            if pattern.search(message.lower())
+        ]
+        assert result["matched_patterns"] == expected
+
+
+def test_otp_fast_path_requires_exactly_six_digits():
+    """Only 6-digit messages take the OTP fast path; others score normally."""
+    detector = IntentDetector()
+
+    result = detector.detect_intent("123456")
+    assert result["intent"] is IntentType.PAYMENT
+    assert result["confidence"] == 0.95
+
+    # Other plain numeric messages fall through to the default
+    for message in ("1234", "2024", "12345678"):
+        result = detector.detect_intent(message)
+        assert result["intent"] is IntentType.SHOPPING
+        assert result["confidence"] == 0.0
+
+    # Six digits embedded in text still match the \b\d{6}\b pattern
+    assert detector.detect_intent("my code is 987654")["intent"] is IntentType.PAYMENT
@@ -0,0 +1,75 @@
+"""Test session manager expiry and reuse with a scaled-down timeout."""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.linebot_ap2.common.session_manager import SessionManager
+
+
+def _manager(timeout_seconds: float) -> SessionManager:
+    """Build a manager with a short session timeout for expiry tests."""
+    return SessionManager(
+        "test_app",
+        config={
+            "session_timeout_minutes": timeout_seconds / 60,
+            "cleanup_interval_seconds": 3600,  # never fires during a test
+        },
+    )
+
+
+async def test_active_user_keeps_session_across_creation_ttl():
+    """A continuously active user keeps one session (sliding window).
+
+    The TTL entry must be refreshed on reuse; with a creation-anchored
+    TTL the session would be evicted mid-conversation.
+    """
+    manager = _manager(0.5)
+
+    first = await manager.get_or_create_session("user_a")
+
+    # Stay active every 0.2s until well past 0.5s from creation
+    for _ in range(5):
+        await asyncio.sleep(0.2)
+        assert await manager.get_or_create_session("user_a") == first
+
+    manager._cleanup_task.cancel()
+
+
+async def test_expiry_cleans_tracking_after_ttl_eviction():
+    """Expiry removes the tracking record even after TTL cache eviction.
+
+    The TTL cache evicts on its own clock, so by the time the expiry
+    heap reaches a user the cache entry is usually already gone; the
+    user_sessions record must still be removed and counted.
+    """
+    manager = _manager(0.3)
+
+    await manager.get_or_create_session("user_b")
+    assert "user_b" in manager.user_sessions
+
+    # Let both the TTL entry and the heap cutoff lapse
+    await asyncio.sleep(0.7)
+    assert "user_b" not in manager.active_sessions
+
+    await manager._cleanup_expired_sessions()
+
+    assert "user_b" not in manager.user_sessions
+    assert manager.total_sessions_cleaned == 1
+
+    manager._cleanup_task.cancel()
+
+
+async def test_idle_user_gets_fresh_session():
+    """After the inactivity window lapses the user gets a new session."""
+    manager = _manager(0.3)
+
+    first = await manager.get_or_create_session("user_c")
+    await asyncio.sleep(0.7)
+    second = await manager.get_or_create_session("user_c")
+
+    assert second != first
+
+    manager._cleanup_task.cancel()